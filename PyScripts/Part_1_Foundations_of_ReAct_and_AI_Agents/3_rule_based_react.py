@@ -3,22 +3,111 @@
 
 import random
 
+# The rules as a declarative table: which action to take in each state...
+POLICY = {
+    "messy": "clean the room",
+    "dusty": "dust the room",
+    "less messy": "clean the room",  # if less messy, clean the room
+    "clean": "do nothing",
+}
+
+# ...and what each action does: (resulting state, feedback). None keeps the current state.
+ACTIONS = {
+    "clean the room": ("clean", "You cleaned the room. It is now clean."),
+    "dust the room": ("less messy", "You dusted the room. It is now less messy, but still needs cleaning."),
+    "do nothing": (None, "You did nothing."),
+}
+
+class TransitionTable:
+    """
+    The rule set compiled into integer-coded states and actions.
+
+    Every state and action name is interned once to a small integer, and think/act
+    become list lookups, so the cost of a cycle does not grow with the number of rules.
+
+    Attributes:
+        state_names (list): State code -> state name.
+        state_codes (dict): State name -> state code.
+        action_names (list): Action code -> action name.
+        policy (list): State code -> action code (what to think).
+        next_state (list): Action code -> list of state code -> next state code (what acting does).
+        feedback (list): Action code -> feedback message.
+    """
+    def __init__(self, policy, actions, initial_states):
+        """
+        Compiles and validates the rules.
+
+        Args:
+            policy (dict): State name -> action name.
+            actions (dict): Action name -> (resulting state name or None, feedback).
+            initial_states (list): The states an environment may start in.
+
+        Raises:
+            ValueError: If a state has no action, an action is undefined, a transition
+                leads to an unknown state, or a state can never be reached.
+        """
+        states = list(policy)
+        for resulting_state, _ in actions.values():
+            if resulting_state is not None and resulting_state not in states:
+                states.append(resulting_state)
+        for state in initial_states:
+            if state not in states:
+                states.append(state)
+
+        missing_actions = [state for state in states if state not in policy]
+        if missing_actions:
+            raise ValueError(f"No action defined for states: {missing_actions}")
+        undefined_actions = sorted({action for action in policy.values() if action not in actions})
+        if undefined_actions:
+            raise ValueError(f"Policy uses undefined actions: {undefined_actions}")
+
+        self.state_names = states
+        self.state_codes = {name: code for code, name in enumerate(states)}
+        self.action_names = list(actions)
+        action_codes = {name: code for code, name in enumerate(self.action_names)}
+        self.policy = [action_codes[policy[name]] for name in states]
+        self.next_state = [
+            [code if resulting_state is None else self.state_codes[resulting_state] for code in range(len(states))]
+            for resulting_state, _ in actions.values()
+        ]
+        self.feedback = [message for _, message in actions.values()]
+
+        # Every state must be reachable from some initial state by following the policy.
+        reachable = set()
+        frontier = [self.state_codes[state] for state in initial_states]
+        while frontier:
+            code = frontier.pop()
+            if code not in reachable:
+                reachable.add(code)
+                frontier.append(self.next_state[self.policy[code]][code])
+        unreachable = [states[code] for code in range(len(states)) if code not in reachable]
+        if unreachable:
+            raise ValueError(f"Unreachable states: {unreachable}")
+
 class BasicEnvironment:
     """
     Represents a simple environment with different states.
 
     Attributes:
-        current_state (str): The current state of the environment.
+        table (TransitionTable): The compiled rules the states are interned in.
+        current_state (int): The code of the current state of the environment.
     """
-    def __init__(self, initial_state):
-        self.current_state = initial_state
+    def __init__(self, initial_state, table):
+        if initial_state not in table.state_codes:
+            raise ValueError(f"Unknown state: {initial_state}")
+        self.table = table
+        self.current_state = table.state_codes[initial_state]
 
     def get_state(self):
-        """Returns the current state of the environment."""
+        """Returns the code of the current state of the environment."""
         return self.current_state
 
+    def get_state_name(self):
+        """Returns the name of the current state of the environment."""
+        return self.table.state_names[self.current_state]
+
     def change_state(self, new_state):
-        """Changes the state of the environment."""
+        """Changes the state of the environment (by code)."""
         self.current_state = new_state
 
 class ReActAgent:
@@ -27,62 +116,46 @@ class ReActAgent:
 
     Attributes:
         environment (BasicEnvironment): The agent's environment.
+        table (TransitionTable): The compiled rules used to think and act.
     """
     def __init__(self, environment):
         self.environment = environment
+        self.table = environment.table
 
     def observe(self):
-        """Observes the current state of the environment."""
+        """Observes the current state code of the environment."""
         return self.environment.get_state()
 
     def think(self, observation):
         """
-        Implements more complex rule-based thinking.
+        Looks up the action for the observed state in the compiled policy.
 
         Args:
-            observation (str): The current observation (environment state).
+            observation (int): The current observation (environment state code).
 
         Returns:
-            str: The action to perform.
+            int: The code of the action to perform.
         """
-        if observation == "messy":
-            return "clean the room"
-        elif observation == "dusty":
-            return "dust the room"
-        elif observation == "less messy":
-            return "clean the room"  # if less messy, clean the room
-        elif observation == "clean":
-            return "do nothing"
-        else:
-            return "unknown state"
+        return self.table.policy[observation]
 
     def act(self, action):
         """
         Performs an action and updates the environment if necessary.
 
         Args:
-            action (str): The action to perform.
+            action (int): The code of the action to perform.
 
         Returns:
             str: The result of the action.
         """
-        if action == "clean the room":
-            self.environment.change_state("clean")
-            return "You cleaned the room. It is now clean." # More verbose feedback
-        elif action == "dust the room":
-            self.environment.change_state("less messy")
-            return "You dusted the room. It is now less messy, but still needs cleaning." # More verbose feedback
-        elif action == "do nothing":
-            return "You did nothing."
-        elif action == "unknown state":
-            return "I don't know what to do in this state."
-        else:
-            return "I don't know how to do that."
+        self.environment.change_state(self.table.next_state[action][self.environment.get_state()])
+        return self.table.feedback[action]
 
 if __name__ == "__main__":
     possible_states = ["messy", "clean", "dusty", "less messy"] # Added "less messy" to possible states
+    table = TransitionTable(POLICY, ACTIONS, possible_states) # Compiled (and validated) once
     initial_state = random.choice(possible_states)
-    room_environment = BasicEnvironment(initial_state)
+    room_environment = BasicEnvironment(initial_state, table)
     agent = ReActAgent(room_environment)
 
     num_cycles = 5
@@ -90,14 +163,14 @@ if __name__ == "__main__":
         print(f"--- ReAct Cycle {cycle + 1} ---")
         # Step 1: Observation
         observation = agent.observe()
-        print(f"Observation: The room is {observation}")
+        print(f"Observation: The room is {table.state_names[observation]}")
 
         # Step 2: Thought
         thought = agent.think(observation)
-        print(f"Thought: {thought}")
+        print(f"Thought: {table.action_names[thought]}")
 
         # Step 3: Action
         action = agent.act(thought)
         print(f"Action Result: {action}")
-        print(f"Cycle Complete: The room's current state is {room_environment.get_state()}") # Cycle completion message
+        print(f"Cycle Complete: The room's current state is {room_environment.get_state_name()}") # Cycle completion message
         print("-" * 20)
\ No newline at end of file
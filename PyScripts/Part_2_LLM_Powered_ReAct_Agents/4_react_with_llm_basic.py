@@ -1,16 +1,88 @@
 # 4_react_with_llm_basic.py
 # This script introduces a basic LLM into the ReAct cycle.
 
+import hashlib
 import random
 import os
-from langchain.llms import OpenAI
-from dotenv import load_dotenv
+import re
+import textwrap
+import threading
 
-load_dotenv()
-
-# Get the API key from the environment variable
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+class LazyOpenAI:
+    """
+    Stands in for langchain's OpenAI LLM and creates the real one on first use.
+
+    langchain (and the .env file, when no API key was given) are only loaded by the first
+    call, normally the first think(), so importing this module and creating agents stays
+    cheap on paths that never call the LLM.
+
+    Attributes:
+        kwargs (dict): The arguments for langchain's OpenAI(...).
+        model_name (str): The model the real LLM will use, known without importing langchain.
+        temperature (float): Its sampling temperature, likewise.
+        llm: The real LLM, once created.
+    """
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.model_name = kwargs.get("model_name", "gpt-3.5-turbo-instruct")  # langchain's defaults
+        self.temperature = kwargs.get("temperature", 0.7)
+        self.llm = None
+        self.lock = threading.Lock()
+
+    def resolve(self):
+        """Imports langchain and creates the real LLM (only once, even from several threads)."""
+        with self.lock:
+            if self.llm is None:
+                from langchain.llms import OpenAI
+                kwargs = dict(self.kwargs)
+                if not kwargs.get("openai_api_key"):
+                    from dotenv import load_dotenv
+                    load_dotenv()
+                    kwargs["openai_api_key"] = os.getenv("OPENAI_API_KEY")
+                self.llm = OpenAI(**kwargs)
+        return self.llm
+
+    def __call__(self, prompt, *args, **kwargs):
+        return self.resolve()(prompt, *args, **kwargs)
+
+    def stream(self, prompt, *args, **kwargs):
+        return self.resolve().stream(prompt, *args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in ("kwargs", "model_name", "temperature", "llm", "lock"):  # Not set yet (e.g. while unpickling)
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+class PromptBuilder:
+    """
+    Builds prompts as a byte-stable static prefix followed by a dynamic suffix.
+
+    LLM providers and local inference servers reuse the work done on a prompt prefix they
+    have already seen, so everything that never changes between calls (instructions, tools,
+    examples) goes first and the per-call sections follow, least volatile first.
+
+    Attributes:
+        static_prefix (str): The fixed start of every prompt.
+        cue (str): The line the model completes (e.g. "Action:").
+        fingerprint (str): A short hash of the static prefix; it must not change between calls.
+    """
+    def __init__(self, static_prefix, cue):
+        self.static_prefix = textwrap.dedent(static_prefix).strip() + "\n"
+        self.cue = cue
+        self.fingerprint = hashlib.sha256(self.static_prefix.encode("utf-8")).hexdigest()[:16]
+
+    def build(self, *sections):
+        """Returns the static prefix, then each (label, value) section in order, then the cue."""
+        dynamic_suffix = "".join(f"\n{label}: {value}" for label, value in sections)
+        return f"{self.static_prefix}{dynamic_suffix}\n\n{self.cue}"
+
+THINK_PROMPT = PromptBuilder("""
+    You are an agent in a simple environment. Your goal is to keep the room clean.
+    Based on the current state of the room, what action should you take?
+""", cue="Action:")
+
 class BasicEnvironment:
     """
     Represents a simple environment with different states.
@@ -29,24 +101,73 @@ class BasicEnvironment:
         """Changes the state of the environment."""
         self.current_state = new_state
 
+class ActionMatcher:
+    """
+    Maps free-text LLM output to an action id in a single pass.
+
+    Every keyword (actions and synonyms such as "relax") is compiled once into a
+    trie-shaped regular expression, so scanning the text costs about the same no
+    matter how many actions are in the vocabulary. When several keywords occur,
+    the action listed first in the vocabulary wins, like the original if/elif chain
+    (keywords that overlap in the text resolve to the longest one).
+
+    Attributes:
+        keywords (dict): Keyword -> (priority, action id).
+    """
+    def __init__(self, vocabulary):
+        """
+        Args:
+            vocabulary (list): (action id, [keywords]) pairs in priority order.
+        """
+        self.keywords = {}
+        for priority, (action_id, keywords) in enumerate(vocabulary):
+            for keyword in keywords:
+                self.keywords.setdefault(keyword.lower(), (priority, action_id))
+        trie = {}
+        for keyword in self.keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}  # Marks the end of a keyword
+        self.pattern = re.compile(self._trie_to_regex(trie))
+
+    def _trie_to_regex(self, node):
+        branches = [re.escape(char) + self._trie_to_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        regex = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{regex})?" if "" in node else regex
+
+    def match(self, text):
+        """Returns the id of the highest-priority action mentioned in `text`, or None."""
+        best = None
+        for found in self.pattern.finditer(text.lower()):
+            candidate = self.keywords[found.group()]
+            if best is None or candidate < best:
+                best = candidate
+                if best[0] == 0:
+                    break  # Nothing can outrank the first action
+        return best[1] if best else None
+
+ACTION_MATCHER = ActionMatcher([
+    ("clean the room", ["clean"]),
+    ("dust the room", ["dust"]),
+    ("do nothing", ["nothing", "relax"]),
+    ("unknown state", ["unknown"]),
+])
+
 class ReActAgent:
     # ... (Agent class remains the same except for the act method)
-    def __init__(self, environment, openai_api_key):
+    def __init__(self, environment, openai_api_key, llm=None):
         self.environment = environment
-        self.llm = OpenAI(temperature=0, openai_api_key=openai_api_key)
+        self.llm = llm or LazyOpenAI(temperature=0, openai_api_key=openai_api_key)
 
     def observe(self):
         return self.environment.get_state()
 
     def think(self, observation):
-        prompt = f"""
-        You are an agent in a simple environment. Your goal is to keep the room clean.
-        The current state of the room is: {observation}
-
-        Based on this observation, what action should you take?
-
-        Action:
-        """
+        prompt = THINK_PROMPT.build(("The current state of the room is", observation))
+        self.last_prefix_fingerprint = THINK_PROMPT.fingerprint
         try:
             llm_output = self.llm(prompt)
             action = llm_output.strip()
@@ -70,21 +191,25 @@ class ReActAgent:
         if debug:
             print(f"Raw LLM Output: {action}") # Print raw LLM output if debug is True
 
-        if "clean" in action.lower(): # Partial matching
+        action_id = ACTION_MATCHER.match(action) # Partial matching, in a single pass over the output
+        if action_id == "clean the room":
             self.environment.change_state("clean")
             return "You cleaned the room. It is now clean."
-        elif "dust" in action.lower(): # Partial Matching
+        elif action_id == "dust the room":
             self.environment.change_state("less messy")
             return "You dusted the room. It is now less messy, but still needs cleaning."
-        elif "nothing" in action.lower() or "relax" in action.lower():  # Partial matching for "do nothing" and added "relax"
+        elif action_id == "do nothing":  # Matches "do nothing" and the "relax" synonym
             return "You did nothing."
-        elif "unknown" in action.lower():
+        elif action_id == "unknown state":
             return "I don't know what to do in this state."
 
         else:
             return f"I don't know how to do '{action}'." # More informative message
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()  # Read .env only when run as a script; importing the module stays cheap
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     possible_states = ["messy", "clean", "dusty"]
     initial_state = random.choice(possible_states)
     room_environment = BasicEnvironment(initial_state)
@@ -108,4 +233,4 @@ if __name__ == "__main__":
         action_result = agent.act(thought, debug=True) # debug set to true so we can see the output
         print(f"Action Result: {action_result}")
         print(f"Cycle Complete: The room's current state is {room_environment.get_state()}")
-        print("-" * 20)
\ No newline at end of file
+        print("-" * 20)
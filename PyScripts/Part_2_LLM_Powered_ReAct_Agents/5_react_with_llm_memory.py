@@ -1,15 +1,93 @@
 # 6_react_with_llm_memory.py
 # This script demonstrates using an LLM with memory in the ReAct cycle.
 
+import argparse
+import hashlib
+import json
 import random
 import os
-from langchain.llms import OpenAI
-from dotenv import load_dotenv
+import re
+import textwrap
+import threading
+from array import array
 
-load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 
+class LazyOpenAI:
+    """
+    Stands in for langchain's OpenAI LLM and creates the real one on first use.
+
+    langchain (and the .env file, when no API key was given) are only loaded by the first
+    call, normally the first think(), so importing this module and creating agents stays
+    cheap on paths that never call the LLM.
+
+    Attributes:
+        kwargs (dict): The arguments for langchain's OpenAI(...).
+        model_name (str): The model the real LLM will use, known without importing langchain.
+        temperature (float): Its sampling temperature, likewise.
+        llm: The real LLM, once created.
+    """
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.model_name = kwargs.get("model_name", "gpt-3.5-turbo-instruct")  # langchain's defaults
+        self.temperature = kwargs.get("temperature", 0.7)
+        self.llm = None
+        self.lock = threading.Lock()
+
+    def resolve(self):
+        """Imports langchain and creates the real LLM (only once, even from several threads)."""
+        with self.lock:
+            if self.llm is None:
+                from langchain.llms import OpenAI
+                kwargs = dict(self.kwargs)
+                if not kwargs.get("openai_api_key"):
+                    from dotenv import load_dotenv
+                    load_dotenv()
+                    kwargs["openai_api_key"] = os.getenv("OPENAI_API_KEY")
+                self.llm = OpenAI(**kwargs)
+        return self.llm
+
+    def __call__(self, prompt, *args, **kwargs):
+        return self.resolve()(prompt, *args, **kwargs)
+
+    def stream(self, prompt, *args, **kwargs):
+        return self.resolve().stream(prompt, *args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in ("kwargs", "model_name", "temperature", "llm", "lock"):  # Not set yet (e.g. while unpickling)
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+class PromptBuilder:
+    """
+    Builds prompts as a byte-stable static prefix followed by a dynamic suffix.
+
+    LLM providers and local inference servers reuse the work done on a prompt prefix they
+    have already seen, so everything that never changes between calls (instructions, tools,
+    examples) goes first and the per-call sections follow, least volatile first.
+
+    Attributes:
+        static_prefix (str): The fixed start of every prompt.
+        cue (str): The line the model completes (e.g. "Action:").
+        fingerprint (str): A short hash of the static prefix; it must not change between calls.
+    """
+    def __init__(self, static_prefix, cue):
+        self.static_prefix = textwrap.dedent(static_prefix).strip() + "\n"
+        self.cue = cue
+        self.fingerprint = hashlib.sha256(self.static_prefix.encode("utf-8")).hexdigest()[:16]
+
+    def build(self, *sections):
+        """Returns the static prefix, then each (label, value) section in order, then the cue."""
+        dynamic_suffix = "".join(f"\n{label}: {value}" for label, value in sections)
+        return f"{self.static_prefix}{dynamic_suffix}\n\n{self.cue}"
+
+THINK_PROMPT = PromptBuilder("""
+    You are an agent in a simple environment.
+    You are given your goal, your memory of past observations, actions, and outcomes, and the current state of the room.
+    Based on your memory and the current state, what is the BEST single action to take NOW to achieve your goal?
+""", cue="Action:")
+
 class BasicEnvironment:
     """
     Represents a simple environment with different states and a goal state.
@@ -34,11 +112,141 @@ class BasicEnvironment:
         """Checks if the current state matches the goal state."""
         return self.current_state == self.goal_state
 
+class ActionMatcher:
+    """
+    Maps free-text LLM output to an action id in a single pass.
+
+    Every keyword (actions and synonyms such as "relax") is compiled once into a
+    trie-shaped regular expression, so scanning the text costs about the same no
+    matter how many actions are in the vocabulary. When several keywords occur,
+    the action listed first in the vocabulary wins, like the original if/elif chain
+    (keywords that overlap in the text resolve to the longest one).
+
+    Attributes:
+        keywords (dict): Keyword -> (priority, action id).
+    """
+    def __init__(self, vocabulary):
+        """
+        Args:
+            vocabulary (list): (action id, [keywords]) pairs in priority order.
+        """
+        self.keywords = {}
+        for priority, (action_id, keywords) in enumerate(vocabulary):
+            for keyword in keywords:
+                self.keywords.setdefault(keyword.lower(), (priority, action_id))
+        trie = {}
+        for keyword in self.keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}  # Marks the end of a keyword
+        self.pattern = re.compile(self._trie_to_regex(trie))
+
+    def _trie_to_regex(self, node):
+        branches = [re.escape(char) + self._trie_to_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        regex = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{regex})?" if "" in node else regex
+
+    def match(self, text):
+        """Returns the id of the highest-priority action mentioned in `text`, or None."""
+        best = None
+        for found in self.pattern.finditer(text.lower()):
+            candidate = self.keywords[found.group()]
+            if best is None or candidate < best:
+                best = candidate
+                if best[0] == 0:
+                    break  # Nothing can outrank the first action
+        return best[1] if best else None
+
+ACTION_MATCHER = ActionMatcher([
+    ("clean the room", ["clean"]),
+    ("dust the room", ["dust"]),
+    ("do nothing", ["nothing", "relax"]),
+    ("unknown state", ["unknown"]),
+])
+
+class PolicyStore:
+    """
+    A distilled policy: (state, goal) -> decision pairs learned from LLM-driven episodes.
+
+    An entry is promoted to the fast path once the same decision has succeeded
+    `promote_after` times in a row, and is then served without an LLM call. A fraction
+    `sample_rate` of fast-path lookups still goes to the LLM; if the LLM disagrees, or a
+    served decision fails, the entry is demoted, so drift is caught. With a `path`,
+    entries are loaded from and saved to that JSON file, so a run starts with what
+    earlier runs learned; without one the store only lives as long as the process.
+
+    Attributes:
+        entries (dict): (state, goal) -> {"decision": ..., "successes": int}.
+        served (int): Decisions served without an LLM call.
+        sampled (int): Promoted decisions sent back to the LLM for drift detection.
+        drift (int): Promoted entries demoted because the LLM or the outcome disagreed.
+    """
+    def __init__(self, path=None, promote_after=3, sample_rate=0.05):
+        self.path = path
+        self.promote_after = promote_after
+        self.sample_rate = sample_rate
+        self.entries = {}
+        self.served = 0
+        self.sampled = 0
+        self.drift = 0
+        if path and os.path.exists(path):
+            with open(path) as store_file:
+                for entry in json.load(store_file):
+                    self.entries[(entry["state"], entry["goal"])] = {"decision": entry["decision"], "successes": entry["successes"]}
+
+    def is_promoted(self, state, goal):
+        entry = self.entries.get((state, goal))
+        return entry is not None and entry["successes"] >= self.promote_after
+
+    def lookup(self, state, goal):
+        """Returns the promoted decision for (state, goal), or None if the LLM should decide."""
+        if not self.is_promoted(state, goal):
+            return None
+        if random.random() < self.sample_rate:
+            self.sampled += 1
+            return None
+        self.served += 1
+        return self.entries[(state, goal)]["decision"]
+
+    def record(self, state, goal, decision, succeeded):
+        """Records the outcome of a decision, whether it came from the LLM or the fast path."""
+        key = (state, goal)
+        entry = self.entries.get(key)
+        promoted = self.is_promoted(state, goal)
+        if entry is not None and entry["decision"] == decision:
+            if succeeded:
+                entry["successes"] += 1
+            else:
+                self.drift += promoted
+                del self.entries[key]
+        else:
+            if entry is not None:
+                self.drift += promoted  # The LLM now decides differently
+                del self.entries[key]
+            if succeeded:
+                self.entries[key] = {"decision": decision, "successes": 1}
+
+    def save(self):
+        if self.path:
+            with open(self.path, "w") as store_file:
+                json.dump([{"state": state, "goal": goal, **entry} for (state, goal), entry in self.entries.items()], store_file, indent=2)
+
+ROOM_DISTANCE = {"messy": 3, "dusty": 2, "less messy": 1, "clean": 0}  # How much work each state is from a clean room
+
+def made_progress(state_before, environment):
+    """A decision succeeded if it brought the room closer to clean (so dusting a dusty room counts too)."""
+    distance_before = ROOM_DISTANCE.get(state_before)
+    distance_after = ROOM_DISTANCE.get(environment.get_state())
+    return distance_before is not None and distance_after is not None and distance_after < distance_before
+
 class ReActAgent:
     """Base class for ReAct agents."""
-    def __init__(self, environment, openai_api_key):
+    def __init__(self, environment, openai_api_key, llm=None):
         self.environment = environment
-        self.llm = OpenAI(temperature=0, openai_api_key=openai_api_key)
+        self.llm = llm or LazyOpenAI(temperature=0, openai_api_key=openai_api_key)
 
     def observe(self):
         return self.environment.get_state()
@@ -47,39 +255,160 @@ class ReActAgent:
         if debug:
             print(f"Raw LLM Output: {action}")
 
-        if "clean" in action.lower():
+        action_id = ACTION_MATCHER.match(action)
+        if action_id == "clean the room":
             self.environment.change_state("clean")
             return "You cleaned the room. It is now clean."
-        elif "dust" in action.lower():
+        elif action_id == "dust the room":
             self.environment.change_state("less messy")
             return "You dusted the room. It is now less messy, but still needs cleaning."
-        elif "nothing" in action.lower() or "relax" in action.lower():
+        elif action_id == "do nothing":
             return "You did nothing."
-        elif "unknown" in action.lower():
+        elif action_id == "unknown state":
             return "I don't know what to do in this state."
         else:
             return f"I don't know how to do '{action}'."
 
+class Interner:
+    """
+    Maps strings to small integer ids and back, so each distinct state, action and outcome is stored once.
+
+    Ids are reference-counted: once the last step using a string is evicted, the string
+    is dropped and its id reused, so the interner never outgrows the memory it serves.
+    """
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+        self.refs = []
+        self.free_ids = []
+
+    def intern(self, text):
+        string_id = self.ids.get(text)
+        if string_id is None:
+            if self.free_ids:
+                string_id = self.free_ids.pop()
+                self.strings[string_id] = text
+            else:
+                string_id = len(self.strings)
+                self.strings.append(text)
+                self.refs.append(0)
+            self.ids[text] = string_id
+        self.refs[string_id] += 1
+        return string_id
+
+    def release(self, string_id):
+        """Drops one reference to an id, forgetting its string when none are left."""
+        self.refs[string_id] -= 1
+        if not self.refs[string_id]:
+            del self.ids[self.strings[string_id]]
+            self.strings[string_id] = None
+            self.free_ids.append(string_id)
+
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+class RingBufferMemory:
+    """
+    A fixed-capacity ring buffer of the agent's steps, stored as compact records and rendered only when a prompt is built.
+
+    Each step is kept as three interned string ids and its estimated token count, in
+    preallocated unboxed arrays, so a step costs 16 bytes however long its texts are and
+    appending never reallocates. Nothing is formatted when a step is recorded; render()
+    builds the prompt text from the retained steps. The oldest steps are evicted once the
+    buffer is full or their estimated token count exceeds `token_budget`.
+
+    Attributes:
+        capacity (int): Maximum number of steps kept.
+        token_budget (int): Maximum estimated tokens in the rendered memory.
+        total_tokens (int): Estimated tokens currently in the rendered memory.
+        names (Interner): The state, action and outcome strings of the retained steps.
+    """
+    LINE = "Observation: {}, Action: {}, Outcome: {}"
+
+    def __init__(self, capacity=256, token_budget=1000, count_tokens=None):
+        self.capacity = capacity
+        self.token_budget = token_budget
+        self.count_tokens = count_tokens or (lambda text: len(text) // 4 + 1)  # Rough estimate: ~4 characters per token
+        self.line_tokens = self.count_tokens(self.LINE.format("", "", ""))
+        self.state_ids = array("I", [0]) * capacity
+        self.action_ids = array("I", [0]) * capacity
+        self.outcome_ids = array("I", [0]) * capacity
+        self.step_tokens = array("I", [0]) * capacity
+        self.start = 0  # Index of the oldest step
+        self.count = 0
+        self.total_tokens = 0
+        self.names = Interner()
+
+    def __len__(self):
+        return self.count
+
+    def steps(self):
+        """Yields the retained steps, oldest first, as (state, action, outcome) tuples."""
+        names = self.names
+        for offset in range(self.count):
+            slot = (self.start + offset) % self.capacity
+            yield names[self.state_ids[slot]], names[self.action_ids[slot]], names[self.outcome_ids[slot]]
+
+    def __iter__(self):
+        """Yields the retained steps, oldest first, as lines of prompt text."""
+        for step in self.steps():
+            yield self.LINE.format(*step)
+
+    def _evict_oldest(self):
+        slot = self.start
+        for string_id in (self.state_ids[slot], self.action_ids[slot], self.outcome_ids[slot]):
+            self.names.release(string_id)
+        self.total_tokens -= self.step_tokens[slot]
+        self.start = (self.start + 1) % self.capacity
+        self.count -= 1
+
+    def record(self, state, action, outcome):
+        """Adds a step, evicting the oldest ones to stay within capacity and token budget."""
+        tokens = self.line_tokens + sum(self.count_tokens(text) for text in (state, action, outcome))
+        if self.count == self.capacity:
+            self._evict_oldest()
+        slot = (self.start + self.count) % self.capacity
+        self.state_ids[slot] = self.names.intern(state)
+        self.action_ids[slot] = self.names.intern(action)
+        self.outcome_ids[slot] = self.names.intern(outcome)
+        self.step_tokens[slot] = tokens
+        self.count += 1
+        self.total_tokens += tokens
+        while self.count > 1 and self.total_tokens > self.token_budget:
+            self._evict_oldest()
+
+    def render(self):
+        """Returns the memory as prompt text."""
+        return "\n".join(self) if self.count else "No memory available."
+
+    def find(self, state=None, action=None):
+        """Returns the (state, action, outcome) steps, oldest first, with the given state and/or action."""
+        return [
+            step for step in self.steps()
+            if (state is None or step[0] == state) and (action is None or step[1] == action)
+        ]
+
 class ReActMemoryAgent(ReActAgent):
     """A ReAct agent that uses an LLM with memory."""
 
-    def __init__(self, environment, openai_api_key):
-        super().__init__(environment, openai_api_key)
-        self.memory = []
+    def __init__(self, environment, openai_api_key, memory_capacity=256, memory_token_budget=1000, policy_store=None, llm=None):
+        super().__init__(environment, openai_api_key, llm)
+        self.memory = RingBufferMemory(memory_capacity, memory_token_budget)
+        self.policy_store = policy_store
 
     def think(self, observation, goal):
         """Uses the LLM with memory to make a decision (single action)."""
-        memory_string = "\n".join(self.memory) if self.memory else "No memory available."
-        prompt = f"""
-        You are an agent in a simple environment. Your current goal is: {goal}
-        The current state of the room is: {observation}
-        Here is your memory of past observations, actions, and outcomes:
-        {memory_string}
-
-        Based on your memory and the current state, what is the BEST single action to take NOW to achieve your goal?
-
-        Action:
-        """
+        if self.policy_store is not None:
+            action = self.policy_store.lookup(observation, goal)
+            if action is not None:
+                return action  # A confirmed decision from the distilled policy, no LLM call
+        memory_string = self.memory.render()
+        prompt = THINK_PROMPT.build(
+            ("Your current goal is", goal),
+            ("Here is your memory of past observations, actions, and outcomes", "\n" + memory_string),
+            ("The current state of the room is", observation),
+        )
+        self.last_prefix_fingerprint = THINK_PROMPT.fingerprint
         try:
             llm_output = self.llm(prompt)
             thought = llm_output.strip()
@@ -90,16 +419,22 @@ class ReActMemoryAgent(ReActAgent):
 
     def act(self, action, debug=False):
         action_result = super().act(action, debug)
-        self.memory.append(f"Observation: {self.environment.get_state()}, Action: {action}, Outcome: {action_result}")
-        self.memory = self.memory[-5:]
+        self.memory.record(self.environment.get_state(), action, action_result)
         return action_result
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()  # Read .env only when run as a script; importing the module stays cheap
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    parser = argparse.ArgumentParser(description="ReAct agent with LLM memory.")
+    parser.add_argument("--policy-store", metavar="PATH", help="JSON file to load the learned policy from and save it to (by default nothing is kept between runs)")
+    args = parser.parse_args()
     possible_states = ["messy", "clean", "dusty", "less messy"]
     initial_state = random.choice(possible_states)
     goal = "Make the room clean."
-    room_environment = BasicEnvironment(initial_state, goal)
-    agent = ReActMemoryAgent(room_environment, OPENAI_API_KEY)
+    room_environment = BasicEnvironment(initial_state)  # The goal state is "clean"
+    policy_store = PolicyStore(args.policy_store)  # Only persisted with --policy-store
+    agent = ReActMemoryAgent(room_environment, OPENAI_API_KEY, policy_store=policy_store)
 
     num_cycles = 5
 
@@ -126,12 +461,16 @@ if __name__ == "__main__":
         if thought != "unknown state":
             action_result = agent.act(thought, debug=True)
             print(f"Action Result: {action_result}")
+            policy_store.record(observation, goal, thought, made_progress(observation, room_environment))
         else:
             print("No valid thought available or unknown state. Skipping action.")
 
         print(f"Cycle Complete: The room's current state is {room_environment.get_state()}")
-        print(f"Memory after cycle {cycle + 1}: {agent.memory}")
+        print(f"Memory after cycle {cycle + 1}: {list(agent.memory)} ({agent.memory.total_tokens} tokens)")
         if room_environment.is_goal_state():
             print("Goal achieved!")
             break
-        print("-" * 20)
\ No newline at end of file
+        print("-" * 20)
+
+    policy_store.save()
+    print(f"Policy store: {policy_store.served} decisions served without the LLM, {policy_store.sampled} sampled for drift, {policy_store.drift} drifted")
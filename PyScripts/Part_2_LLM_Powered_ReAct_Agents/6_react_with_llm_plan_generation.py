@@ -1,14 +1,90 @@
 # 6_react_with_llm_plan_generation.py
 # This script demonstrates using an LLM for planning within the ReAct cycle.
 
+import argparse
+import hashlib
+import json
 import random
 import os
-from langchain.llms import OpenAI
-from dotenv import load_dotenv
+import re
+import textwrap
+import threading
 
-load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+class LazyOpenAI:
+    """
+    Stands in for langchain's OpenAI LLM and creates the real one on first use.
+
+    langchain (and the .env file, when no API key was given) are only loaded by the first
+    call, normally the first think(), so importing this module and creating agents stays
+    cheap on paths that never call the LLM.
+
+    Attributes:
+        kwargs (dict): The arguments for langchain's OpenAI(...).
+        model_name (str): The model the real LLM will use, known without importing langchain.
+        temperature (float): Its sampling temperature, likewise.
+        llm: The real LLM, once created.
+    """
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.model_name = kwargs.get("model_name", "gpt-3.5-turbo-instruct")  # langchain's defaults
+        self.temperature = kwargs.get("temperature", 0.7)
+        self.llm = None
+        self.lock = threading.Lock()
+
+    def resolve(self):
+        """Imports langchain and creates the real LLM (only once, even from several threads)."""
+        with self.lock:
+            if self.llm is None:
+                from langchain.llms import OpenAI
+                kwargs = dict(self.kwargs)
+                if not kwargs.get("openai_api_key"):
+                    from dotenv import load_dotenv
+                    load_dotenv()
+                    kwargs["openai_api_key"] = os.getenv("OPENAI_API_KEY")
+                self.llm = OpenAI(**kwargs)
+        return self.llm
+
+    def __call__(self, prompt, *args, **kwargs):
+        return self.resolve()(prompt, *args, **kwargs)
+
+    def stream(self, prompt, *args, **kwargs):
+        return self.resolve().stream(prompt, *args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in ("kwargs", "model_name", "temperature", "llm", "lock"):  # Not set yet (e.g. while unpickling)
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+class PromptBuilder:
+    """
+    Builds prompts as a byte-stable static prefix followed by a dynamic suffix.
+
+    LLM providers and local inference servers reuse the work done on a prompt prefix they
+    have already seen, so everything that never changes between calls (instructions, tools,
+    examples) goes first and the per-call sections follow, least volatile first.
+
+    Attributes:
+        static_prefix (str): The fixed start of every prompt.
+        cue (str): The line the model completes (e.g. "Action:").
+        fingerprint (str): A short hash of the static prefix; it must not change between calls.
+    """
+    def __init__(self, static_prefix, cue):
+        self.static_prefix = textwrap.dedent(static_prefix).strip() + "\n"
+        self.cue = cue
+        self.fingerprint = hashlib.sha256(self.static_prefix.encode("utf-8")).hexdigest()[:16]
+
+    def build(self, *sections):
+        """Returns the static prefix, then each (label, value) section in order, then the cue."""
+        dynamic_suffix = "".join(f"\n{label}: {value}" for label, value in sections)
+        return f"{self.static_prefix}{dynamic_suffix}\n\n{self.cue}"
+
+PLAN_PROMPT = PromptBuilder("""
+    You are an agent in a simple environment.
+    Create a plan (a sequence of actions) to achieve your goal from the current state of the room. List the actions as numbered steps.
+""", cue="Plan:")
+
 class BasicEnvironment:
     """
     Represents a simple environment with different states and a goal state.
@@ -33,11 +109,145 @@ class BasicEnvironment:
         """Checks if the current state matches the goal state."""
         return self.current_state == self.goal_state
 
+class ActionMatcher:
+    """
+    Maps free-text LLM output to an action id in a single pass.
+
+    Every keyword (actions and synonyms such as "relax") is compiled once into a
+    trie-shaped regular expression, so scanning the text costs about the same no
+    matter how many actions are in the vocabulary. When several keywords occur,
+    the action listed first in the vocabulary wins, like the original if/elif chain
+    (keywords that overlap in the text resolve to the longest one).
+
+    Attributes:
+        keywords (dict): Keyword -> (priority, action id).
+    """
+    def __init__(self, vocabulary):
+        """
+        Args:
+            vocabulary (list): (action id, [keywords]) pairs in priority order.
+        """
+        self.keywords = {}
+        for priority, (action_id, keywords) in enumerate(vocabulary):
+            for keyword in keywords:
+                self.keywords.setdefault(keyword.lower(), (priority, action_id))
+        trie = {}
+        for keyword in self.keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}  # Marks the end of a keyword
+        self.pattern = re.compile(self._trie_to_regex(trie))
+
+    def _trie_to_regex(self, node):
+        branches = [re.escape(char) + self._trie_to_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        regex = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{regex})?" if "" in node else regex
+
+    def match(self, text):
+        """Returns the id of the highest-priority action mentioned in `text`, or None."""
+        best = None
+        for found in self.pattern.finditer(text.lower()):
+            candidate = self.keywords[found.group()]
+            if best is None or candidate < best:
+                best = candidate
+                if best[0] == 0:
+                    break  # Nothing can outrank the first action
+        return best[1] if best else None
+
+ACTION_MATCHER = ActionMatcher([
+    ("clean the room", ["clean"]),
+    ("dust the room", ["dust"]),
+    ("do nothing", ["nothing", "relax"]),
+    ("unknown state", ["unknown"]),
+])
+
+# Plan steps must name a whole action ("1. Clean the room."); a step that only mentions a
+# keyword ("Check whether the room is clean", "Plan: relax") is not an action to execute.
+PLAN_STEP_MATCHER = ActionMatcher([(action_id, [action_id]) for action_id in ("clean the room", "dust the room", "do nothing", "unknown state")])
+
+class PolicyStore:
+    """
+    A distilled policy: (state, goal) -> decision pairs learned from LLM-driven episodes.
+
+    An entry is promoted to the fast path once the same decision has succeeded
+    `promote_after` times in a row, and is then served without an LLM call. A fraction
+    `sample_rate` of fast-path lookups still goes to the LLM; if the LLM disagrees, or a
+    served decision fails, the entry is demoted, so drift is caught. With a `path`,
+    entries are loaded from and saved to that JSON file, so a run starts with what
+    earlier runs learned; without one the store only lives as long as the process.
+
+    Attributes:
+        entries (dict): (state, goal) -> {"decision": ..., "successes": int}.
+        served (int): Decisions served without an LLM call.
+        sampled (int): Promoted decisions sent back to the LLM for drift detection.
+        drift (int): Promoted entries demoted because the LLM or the outcome disagreed.
+    """
+    def __init__(self, path=None, promote_after=3, sample_rate=0.05):
+        self.path = path
+        self.promote_after = promote_after
+        self.sample_rate = sample_rate
+        self.entries = {}
+        self.served = 0
+        self.sampled = 0
+        self.drift = 0
+        if path and os.path.exists(path):
+            with open(path) as store_file:
+                for entry in json.load(store_file):
+                    self.entries[(entry["state"], entry["goal"])] = {"decision": entry["decision"], "successes": entry["successes"]}
+
+    def is_promoted(self, state, goal):
+        entry = self.entries.get((state, goal))
+        return entry is not None and entry["successes"] >= self.promote_after
+
+    def lookup(self, state, goal):
+        """Returns the promoted decision for (state, goal), or None if the LLM should decide."""
+        if not self.is_promoted(state, goal):
+            return None
+        if random.random() < self.sample_rate:
+            self.sampled += 1
+            return None
+        self.served += 1
+        return self.entries[(state, goal)]["decision"]
+
+    def record(self, state, goal, decision, succeeded):
+        """Records the outcome of a decision, whether it came from the LLM or the fast path."""
+        key = (state, goal)
+        entry = self.entries.get(key)
+        promoted = self.is_promoted(state, goal)
+        if entry is not None and entry["decision"] == decision:
+            if succeeded:
+                entry["successes"] += 1
+            else:
+                self.drift += promoted
+                del self.entries[key]
+        else:
+            if entry is not None:
+                self.drift += promoted  # The LLM now decides differently
+                del self.entries[key]
+            if succeeded:
+                self.entries[key] = {"decision": decision, "successes": 1}
+
+    def save(self):
+        if self.path:
+            with open(self.path, "w") as store_file:
+                json.dump([{"state": state, "goal": goal, **entry} for (state, goal), entry in self.entries.items()], store_file, indent=2)
+
+ROOM_DISTANCE = {"messy": 3, "dusty": 2, "less messy": 1, "clean": 0}  # How much work each state is from a clean room
+
+def made_progress(state_before, environment):
+    """A decision succeeded if it brought the room closer to clean (so dusting a dusty room counts too)."""
+    distance_before = ROOM_DISTANCE.get(state_before)
+    distance_after = ROOM_DISTANCE.get(environment.get_state())
+    return distance_before is not None and distance_after is not None and distance_after < distance_before
+
 class ReActAgent:
     """Base class for ReAct agents."""
-    def __init__(self, environment, openai_api_key):
+    def __init__(self, environment, openai_api_key, llm=None):
         self.environment = environment
-        self.llm = OpenAI(temperature=0, openai_api_key=openai_api_key)
+        self.llm = llm or LazyOpenAI(temperature=0, openai_api_key=openai_api_key)
 
     def observe(self):
         return self.environment.get_state()
@@ -46,15 +256,16 @@ class ReActAgent:
         if debug:
             print(f"Raw LLM Output: {action}")
 
-        if "clean" in action.lower():
+        action_id = ACTION_MATCHER.match(action)
+        if action_id == "clean the room":
             self.environment.change_state("clean")
             return "You cleaned the room. It is now clean."
-        elif "dust" in action.lower():
+        elif action_id == "dust the room":
             self.environment.change_state("less messy")
             return "You dusted the room. It is now less messy, but still needs cleaning."
-        elif "nothing" in action.lower() or "relax" in action.lower():
+        elif action_id == "do nothing":
             return "You did nothing."
-        elif "unknown" in action.lower():
+        elif action_id == "unknown state":
             return "I don't know what to do in this state."
         else:
             return f"I don't know how to do '{action}'."
@@ -63,16 +274,18 @@ class ReActAgent:
 class ReActPlanGeneratingAgent(ReActAgent):
     """A ReAct agent that uses an LLM for plan generation."""
 
-    def think(self, observation, goal):
-        """Uses the LLM to generate a plan (sequence of actions)."""
-        prompt = f"""
-        You are an agent in a simple environment. Your current goal is: {goal}
-        The current state of the room is: {observation}
+    def __init__(self, environment, openai_api_key, policy_store=None, llm=None):
+        super().__init__(environment, openai_api_key, llm)
+        self.policy_store = policy_store
 
-        Create a plan (a sequence of actions) to achieve your goal. List the actions as numbered steps.
+    def plan_prompt(self, observation, goal):
+        """Builds the planning prompt for the current observation and goal."""
+        self.last_prefix_fingerprint = PLAN_PROMPT.fingerprint
+        return PLAN_PROMPT.build(("Your current goal is", goal), ("The current state of the room is", observation))
 
-        Plan:
-        """
+    def think(self, observation, goal):
+        """Uses the LLM to generate a plan (sequence of actions)."""
+        prompt = self.plan_prompt(observation, goal)
         try:
             llm_output = self.llm(prompt)
             plan = [step.strip() for step in llm_output.strip().split('\n') if step]
@@ -81,12 +294,56 @@ class ReActPlanGeneratingAgent(ReActAgent):
             print(f"Error during LLM call: {e}")
             return ["unknown state"]
 
+    def think_stream(self, observation, goal, valid_actions=("clean the room", "dust the room", "do nothing")):
+        """
+        Streams the plan from the LLM, yielding each valid step as soon as its line is complete.
+
+        The caller can start acting on step 1 while the rest of the plan is still being
+        generated; stopping iteration early also stops reading from the LLM.
+
+        Args:
+            observation (str): The current state of the environment.
+            goal (str): The goal to plan for.
+            valid_actions (tuple, optional): Steps must mention one of these actions to be yielded.
+
+        Yields:
+            str: The next valid plan step.
+        """
+        if self.policy_store is not None:
+            plan = self.policy_store.lookup(observation, goal)
+            if plan is not None:
+                yield from plan  # A confirmed plan from the distilled policy, no LLM call
+                return
+        prompt = self.plan_prompt(observation, goal)
+        buffer = ""
+        try:
+            for chunk in self.llm.stream(prompt):
+                buffer += chunk
+                *lines, buffer = buffer.split('\n')  # Keep the unfinished line in the buffer
+                for line in lines:
+                    step = line.strip()
+                    if step and PLAN_STEP_MATCHER.match(step) in valid_actions:
+                        yield step
+        except Exception as e:
+            print(f"Error during LLM call: {e}")
+            return
+        step = buffer.strip()
+        if step and PLAN_STEP_MATCHER.match(step) in valid_actions:
+            yield step
+
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()  # Read .env only when run as a script; importing the module stays cheap
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    parser = argparse.ArgumentParser(description="ReAct agent with LLM plan generation.")
+    parser.add_argument("--policy-store", metavar="PATH", help="JSON file to load the learned policy from and save it to (by default nothing is kept between runs)")
+    args = parser.parse_args()
     possible_states = ["messy", "clean", "dusty", "less messy"]
     initial_state = random.choice(possible_states)
     goal = "Make the room clean."
-    room_environment = BasicEnvironment(initial_state, goal)
-    agent = ReActPlanGeneratingAgent(room_environment, OPENAI_API_KEY)
+    room_environment = BasicEnvironment(initial_state)  # The goal state is "clean"
+    policy_store = PolicyStore(args.policy_store)  # Only persisted with --policy-store
+    agent = ReActPlanGeneratingAgent(room_environment, OPENAI_API_KEY, policy_store)
 
     print(f"Initial State: {initial_state}")
     print(f"Goal: {goal}")
@@ -99,28 +356,29 @@ if __name__ == "__main__":
         observation = agent.observe()
         print(f"Observation: The room is {observation}")
 
-        # Step 2: Thought (Now using the LLM for planning)
-        plan = agent.think(observation, goal)
+        # Step 2: Thought (Now using the LLM for planning, streamed step by step)
+        steps = agent.think_stream(observation, goal) # Only valid actions are yielded
+        action = next(steps, None)
 
-        valid_actions = ["clean the room", "dust the room", "do nothing"]
-        plan = [step for step in plan if any(valid_action in step.lower() for valid_action in valid_actions)]
-        print(f"Filtered Plan: {plan} (only valid actions retained)") # Explain plan validation
-
-        if not plan or "unknown state" in plan: # Handle unknown actions more informatively
+        if action is None: # Handle unknown actions more informatively
             print("No valid plan was generated. This might happen due to unexpected LLM output or no suitable action.")
             continue
 
+        # Step 3: Action (Execute the first action as soon as it arrives, before the rest of the plan is generated)
+        action_result = agent.act(action, debug=True)
+        print(f"Action Result: {action_result}")
+
+        plan = [action] + list(steps)
+        policy_store.record(observation, goal, plan, made_progress(observation, room_environment))
         print("Generated Plan:")
         for i, step in enumerate(plan, 1):
             print(f"  {i}. {step}")
 
-        # Step 3: Action (Execute the first action in the plan)
-        action = plan[0]
-        action_result = agent.act(action, debug=True)
-        print(f"Action Result: {action_result}")
-
         print(f"Cycle {cycle + 1} Complete: State = {room_environment.get_state()}, Plan = {plan}")
         if room_environment.is_goal_state():
             print("Goal achieved!")
             break
-        print("-" * 20)
\ No newline at end of file
+        print("-" * 20)
+
+    policy_store.save()
+    print(f"Policy store: {policy_store.served} plans served without the LLM, {policy_store.sampled} sampled for drift, {policy_store.drift} drifted")
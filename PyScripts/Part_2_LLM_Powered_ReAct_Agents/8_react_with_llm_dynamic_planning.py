@@ -1,14 +1,92 @@
 # 8_react_with_llm_dynamic_planning.py
 # This script demonstrates dynamic planning with an LLM within the ReAct cycle.
 
+import argparse
+import hashlib
+import heapq
+import json
 import random
 import os
-from langchain.llms import OpenAI
-from dotenv import load_dotenv
+import re
+import textwrap
+import threading
 
-load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+class LazyOpenAI:
+    """
+    Stands in for langchain's OpenAI LLM and creates the real one on first use.
+
+    langchain (and the .env file, when no API key was given) are only loaded by the first
+    call, normally the first think(), so importing this module and creating agents stays
+    cheap on paths that never call the LLM.
+
+    Attributes:
+        kwargs (dict): The arguments for langchain's OpenAI(...).
+        model_name (str): The model the real LLM will use, known without importing langchain.
+        temperature (float): Its sampling temperature, likewise.
+        llm: The real LLM, once created.
+    """
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.model_name = kwargs.get("model_name", "gpt-3.5-turbo-instruct")  # langchain's defaults
+        self.temperature = kwargs.get("temperature", 0.7)
+        self.llm = None
+        self.lock = threading.Lock()
+
+    def resolve(self):
+        """Imports langchain and creates the real LLM (only once, even from several threads)."""
+        with self.lock:
+            if self.llm is None:
+                from langchain.llms import OpenAI
+                kwargs = dict(self.kwargs)
+                if not kwargs.get("openai_api_key"):
+                    from dotenv import load_dotenv
+                    load_dotenv()
+                    kwargs["openai_api_key"] = os.getenv("OPENAI_API_KEY")
+                self.llm = OpenAI(**kwargs)
+        return self.llm
+
+    def __call__(self, prompt, *args, **kwargs):
+        return self.resolve()(prompt, *args, **kwargs)
+
+    def stream(self, prompt, *args, **kwargs):
+        return self.resolve().stream(prompt, *args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in ("kwargs", "model_name", "temperature", "llm", "lock"):  # Not set yet (e.g. while unpickling)
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+class PromptBuilder:
+    """
+    Builds prompts as a byte-stable static prefix followed by a dynamic suffix.
+
+    LLM providers and local inference servers reuse the work done on a prompt prefix they
+    have already seen, so everything that never changes between calls (instructions, tools,
+    examples) goes first and the per-call sections follow, least volatile first.
+
+    Attributes:
+        static_prefix (str): The fixed start of every prompt.
+        cue (str): The line the model completes (e.g. "Action:").
+        fingerprint (str): A short hash of the static prefix; it must not change between calls.
+    """
+    def __init__(self, static_prefix, cue):
+        self.static_prefix = textwrap.dedent(static_prefix).strip() + "\n"
+        self.cue = cue
+        self.fingerprint = hashlib.sha256(self.static_prefix.encode("utf-8")).hexdigest()[:16]
+
+    def build(self, *sections):
+        """Returns the static prefix, then each (label, value) section in order, then the cue."""
+        dynamic_suffix = "".join(f"\n{label}: {value}" for label, value in sections)
+        return f"{self.static_prefix}{dynamic_suffix}\n\n{self.cue}"
+
+PLAN_PROMPT = PromptBuilder("""
+    You are an agent in a simple environment.
+    Create a plan, or replan when the task says so, (a sequence of actions) to achieve your goal from what you have observed.
+    List the actions as numbered steps.
+""", cue="Plan:")
+
 class BasicEnvironment:
     """
     Represents a simple environment with different states and a goal state.
@@ -33,11 +111,158 @@ class BasicEnvironment:
         """Checks if the current state matches the goal state."""
         return self.current_state == self.goal_state
 
+class ActionMatcher:
+    """
+    Maps free-text LLM output to an action id in a single pass.
+
+    Every keyword (actions and synonyms such as "relax") is compiled once into a
+    trie-shaped regular expression, so scanning the text costs about the same no
+    matter how many actions are in the vocabulary. When several keywords occur,
+    the action listed first in the vocabulary wins, like the original if/elif chain
+    (keywords that overlap in the text resolve to the longest one).
+
+    Attributes:
+        keywords (dict): Keyword -> (priority, action id).
+    """
+    def __init__(self, vocabulary):
+        """
+        Args:
+            vocabulary (list): (action id, [keywords]) pairs in priority order.
+        """
+        self.keywords = {}
+        for priority, (action_id, keywords) in enumerate(vocabulary):
+            for keyword in keywords:
+                self.keywords.setdefault(keyword.lower(), (priority, action_id))
+        trie = {}
+        for keyword in self.keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}  # Marks the end of a keyword
+        self.pattern = re.compile(self._trie_to_regex(trie))
+
+    def _trie_to_regex(self, node):
+        branches = [re.escape(char) + self._trie_to_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        regex = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{regex})?" if "" in node else regex
+
+    def match(self, text):
+        """Returns the id of the highest-priority action mentioned in `text`, or None."""
+        best = None
+        for found in self.pattern.finditer(text.lower()):
+            candidate = self.keywords[found.group()]
+            if best is None or candidate < best:
+                best = candidate
+                if best[0] == 0:
+                    break  # Nothing can outrank the first action
+        return best[1] if best else None
+
+ACTION_MATCHER = ActionMatcher([
+    ("clean the room", ["clean"]),
+    ("dust the room", ["dust"]),
+    ("do nothing", ["nothing", "relax"]),
+    ("unknown state", ["unknown"]),
+])
+
+# Plan steps must name a whole action ("1. Clean the room."); a step that only mentions a
+# keyword ("Check whether the room is clean", "Plan: relax") is not an action to execute.
+PLAN_STEP_MATCHER = ActionMatcher([(action_id, [action_id]) for action_id in ("clean the room", "dust the room", "do nothing", "unknown state")])
+
+class PolicyStore:
+    """
+    A distilled policy: (state, goal) -> decision pairs learned from LLM-driven episodes.
+
+    An entry is promoted to the fast path once the same decision has succeeded
+    `promote_after` times in a row, and is then served without an LLM call. A fraction
+    `sample_rate` of fast-path lookups still goes to the LLM; if the LLM disagrees, or a
+    served decision fails, the entry is demoted, so drift is caught. With a `path`,
+    entries are loaded from and saved to that JSON file, so a run starts with what
+    earlier runs learned; without one the store only lives as long as the process.
+
+    Attributes:
+        entries (dict): (state, goal) -> {"decision": ..., "successes": int}.
+        served (int): Decisions served without an LLM call.
+        sampled (int): Promoted decisions sent back to the LLM for drift detection.
+        drift (int): Promoted entries demoted because the LLM or the outcome disagreed.
+    """
+    def __init__(self, path=None, promote_after=3, sample_rate=0.05):
+        self.path = path
+        self.promote_after = promote_after
+        self.sample_rate = sample_rate
+        self.entries = {}
+        self.served = 0
+        self.sampled = 0
+        self.drift = 0
+        if path and os.path.exists(path):
+            with open(path) as store_file:
+                for entry in json.load(store_file):
+                    self.entries[(entry["state"], entry["goal"])] = {"decision": entry["decision"], "successes": entry["successes"]}
+
+    def is_promoted(self, state, goal):
+        entry = self.entries.get((state, goal))
+        return entry is not None and entry["successes"] >= self.promote_after
+
+    def lookup(self, state, goal):
+        """Returns the promoted decision for (state, goal), or None if the LLM should decide."""
+        if not self.is_promoted(state, goal):
+            return None
+        if random.random() < self.sample_rate:
+            self.sampled += 1
+            return None
+        self.served += 1
+        return self.entries[(state, goal)]["decision"]
+
+    def record(self, state, goal, decision, succeeded):
+        """Records the outcome of a decision, whether it came from the LLM or the fast path."""
+        key = (state, goal)
+        entry = self.entries.get(key)
+        promoted = self.is_promoted(state, goal)
+        if entry is not None and entry["decision"] == decision:
+            if succeeded:
+                entry["successes"] += 1
+            else:
+                self.drift += promoted
+                del self.entries[key]
+        else:
+            if entry is not None:
+                self.drift += promoted  # The LLM now decides differently
+                del self.entries[key]
+            if succeeded:
+                self.entries[key] = {"decision": decision, "successes": 1}
+
+    def save(self):
+        if self.path:
+            with open(self.path, "w") as store_file:
+                json.dump([{"state": state, "goal": goal, **entry} for (state, goal), entry in self.entries.items()], store_file, indent=2)
+
+ROOM_DISTANCE = {"messy": 3, "dusty": 2, "less messy": 1, "clean": 0}  # How much work each state is from a clean room
+
+def made_progress(state_before, environment):
+    """A decision succeeded if it brought the room closer to clean (so dusting a dusty room counts too)."""
+    distance_before = ROOM_DISTANCE.get(state_before)
+    distance_after = ROOM_DISTANCE.get(environment.get_state())
+    return distance_before is not None and distance_after is not None and distance_after < distance_before
+
+# The room's rules, defined once: act(), expected_state() and PlanOracle are all derived from this table
+ROOM_STATES = ["messy", "clean", "dusty", "less messy"]
+ACTION_OUTCOMES = {
+    "clean the room": "You cleaned the room. It is now clean.",
+    "dust the room": "You dusted the room. It is now less messy, but still needs cleaning.",
+    "do nothing": "You did nothing.",
+}
+ROOM_TRANSITIONS = {  # (state, action) -> next state
+    (state, action): {"clean the room": "clean", "dust the room": "less messy"}.get(action, state)
+    for state in ROOM_STATES
+    for action in ACTION_OUTCOMES
+}
+
 class ReActAgent:
     """Base class for ReAct agents."""
-    def __init__(self, environment, openai_api_key):
+    def __init__(self, environment, openai_api_key, llm=None):
         self.environment = environment
-        self.llm = OpenAI(temperature=0, openai_api_key=openai_api_key)
+        self.llm = llm or LazyOpenAI(temperature=0, openai_api_key=openai_api_key)
 
     def observe(self):
         return self.environment.get_state()
@@ -46,48 +271,169 @@ class ReActAgent:
         if debug:
             print(f"Raw LLM Output: {action}")
 
-        if "clean" in action.lower():
-            self.environment.change_state("clean")
-            return "You cleaned the room. It is now clean."
-        elif "dust" in action.lower():
-            self.environment.change_state("less messy")
-            return "You dusted the room. It is now less messy, but still needs cleaning."
-        elif "nothing" in action.lower() or "relax" in action.lower():
-            return "You did nothing."
-        elif "unknown" in action.lower():
+        action_id = ACTION_MATCHER.match(action)
+        next_state = ROOM_TRANSITIONS.get((self.environment.get_state(), action_id))
+        if next_state is not None:
+            self.environment.change_state(next_state)
+            return ACTION_OUTCOMES[action_id]
+        elif action_id == "unknown state":
             return "I don't know what to do in this state."
         else:
             return f"I don't know how to do '{action}'."
 
-class ReActDynamicPlanningAgent(ReActAgent):
-    """A ReAct agent that uses the LLM for dynamic planning."""
-
-    def think(self, observation, goal, is_replanning=False):  # Add is_replanning parameter
-        """Uses the LLM to generate/replan based on current observation."""
-        prompt_prefix = "Replan" if is_replanning else "Create a plan" # Change prompt based on replanning
+class PlanOracle:
+    """
+    Shortest plans over the finite state graph of the environment, precomputed once.
 
-        prompt = f"""
-        You are an agent in a simple environment. Your current goal is: {goal}
-        You have observed: {observation}
+    The graph is given as a transition table (such as ROOM_TRANSITIONS). For every goal
+    state, a backward search
+    over the graph (breadth-first with unit costs, Dijkstra with `action_costs`) stores the
+    first action of a cheapest plan from every state, so plan(state, goal_state) only follows
+    those pointers: O(plan length) per query and no LLM call.
 
-        {prompt_prefix} (a sequence of actions) to achieve your goal. List the actions as numbered steps.
+    Attributes:
+        states (list): All states in the transition table.
+        actions (list): All actions in the transition table.
+        transitions (dict): (state, action) -> next state.
+        best_action (dict): (state, goal state) -> (first action of a cheapest plan, its total cost).
+    """
+    def __init__(self, transitions, action_costs=None):
+        self.transitions = dict(transitions)
+        self.action_costs = action_costs or {}
+        self.states = list(dict.fromkeys(
+            state for (state, _), next_state in self.transitions.items() for state in (state, next_state)
+        ))
+        self.actions = list(dict.fromkeys(action for _, action in self.transitions))
+
+        predecessors = {}  # state -> [(previous state, action)], skipping actions that change nothing
+        for (state, action), next_state in self.transitions.items():
+            if next_state != state:
+                predecessors.setdefault(next_state, []).append((state, action))
+        self.best_action = {}
+        for goal_state in self.states:
+            self._search_backward(goal_state, predecessors)
+
+    def _search_backward(self, goal_state, predecessors):
+        cost_to_go = {goal_state: 0}
+        heap = [(0, goal_state)]
+        while heap:
+            cost, state = heapq.heappop(heap)
+            if cost > cost_to_go[state]:
+                continue
+            for previous, action in predecessors.get(state, []):
+                new_cost = cost + self.action_costs.get(action, 1)
+                if new_cost < cost_to_go.get(previous, float("inf")):
+                    cost_to_go[previous] = new_cost
+                    self.best_action[(previous, goal_state)] = (action, new_cost)
+                    heapq.heappush(heap, (new_cost, previous))
+
+    def plan(self, state, goal_state):
+        """Returns a cheapest list of actions from `state` to `goal_state`, or None if it is unreachable."""
+        plan = []
+        while state != goal_state:
+            if (state, goal_state) not in self.best_action:
+                return None
+            action = self.best_action[(state, goal_state)][0]
+            plan.append(action)
+            state = self.transitions[(state, action)]
+        return plan
+
+    def cost(self, state, goal_state):
+        """Returns the cost of a cheapest plan (its length, with unit costs), or None if unreachable."""
+        return 0 if state == goal_state else self.best_action.get((state, goal_state), (None, None))[1]
+
+    def check(self, state, goal_state, plan):
+        """
+        Validates a plan (e.g. from the LLM) against the state graph.
 
-        Plan:
+        Returns:
+            str: Why the plan is rejected, or None if it reaches the goal at the optimal cost.
         """
+        optimal_cost = self.cost(state, goal_state)
+        cost = 0
+        for step in plan:
+            if state == goal_state:
+                break
+            action = ACTION_MATCHER.match(step)
+            if (state, action) not in self.transitions:
+                return f"'{step}' is not a known action"
+            cost += self.action_costs.get(action, 1)
+            state = self.transitions[(state, action)]
+        if state != goal_state:
+            return f"it ends in '{state}' instead of '{goal_state}'"
+        if cost > optimal_cost:
+            return f"it costs {cost} while the optimal plan costs {optimal_cost}"
+        return None
+
+class ReActDynamicPlanningAgent(ReActAgent):
+    """
+    A ReAct agent that uses the LLM for dynamic planning.
+
+    With a PlanOracle, LLM plans that do not reach the goal state or are longer than
+    optimal are replaced by the oracle's plan; with `use_oracle_planner`, the oracle
+    plans on its own and the LLM is not called at all.
+    """
+
+    def __init__(self, environment, openai_api_key, policy_store=None, oracle=None, use_oracle_planner=False, llm=None):
+        super().__init__(environment, openai_api_key, llm)
+        self.policy_store = policy_store
+        self.oracle = oracle
+        self.use_oracle_planner = use_oracle_planner
+        self.llm_calls = 0  # Plans actually requested from the LLM (not served by the policy store or oracle)
+
+    def think(self, observation, goal, is_replanning=False):  # Add is_replanning parameter
+        """Uses the LLM to generate/replan based on current observation."""
+        if self.oracle is not None and self.use_oracle_planner:
+            return self.oracle.plan(observation, self.environment.goal_state) or []  # Zero-latency planning
+        if self.policy_store is not None:
+            plan = self.policy_store.lookup(observation, goal)
+            if plan is not None:
+                return list(plan)  # A confirmed plan from the distilled policy, no LLM call
+        task = "Replan" if is_replanning else "Create a plan" # Change prompt based on replanning
+        # The task goes in the dynamic suffix, so planning and replanning share one static prefix
+        prompt = PLAN_PROMPT.build(("Your current goal is", goal), ("Task", task), ("You have observed", observation))
+        self.last_prefix_fingerprint = PLAN_PROMPT.fingerprint
+        self.llm_calls += 1
         try:
             llm_output = self.llm(prompt)
             plan = [step.strip() for step in llm_output.strip().split('\n') if step]
-            return plan
         except Exception as e:
             print(f"Error during LLM call: {e}")
             return ["unknown state"]
+        if self.oracle is not None:
+            steps = [step for step in plan if PLAN_STEP_MATCHER.match(step) in self.oracle.actions]
+            rejection = self.oracle.check(observation, self.environment.goal_state, steps)
+            if rejection is not None:
+                print(f"LLM plan {steps} rejected because {rejection}. Using the optimal plan instead.")
+                return self.oracle.plan(observation, self.environment.goal_state) or []
+        return plan
+
+    def expected_state(self, state, action):
+        """Predicts the state after `action` from ROOM_TRANSITIONS, the table act() follows, without changing the environment."""
+        return ROOM_TRANSITIONS.get((state, ACTION_MATCHER.match(action)), state) # An unknown action leaves the room as it is
+
+    def expected_states(self, state, plan):
+        """Returns the expected post-state of every step of the plan, starting from `state`."""
+        expected = []
+        for step in plan:
+            state = self.expected_state(state, step)
+            expected.append(state)
+        return expected
 
 if __name__ == "__main__":
-    possible_states = ["messy", "clean", "dusty", "less messy"]
-    initial_state = random.choice(possible_states)
+    from dotenv import load_dotenv
+    load_dotenv()  # Read .env only when run as a script; importing the module stays cheap
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    parser = argparse.ArgumentParser(description="ReAct agent with LLM dynamic planning.")
+    parser.add_argument("--policy-store", metavar="PATH", help="JSON file to load the learned policy from and save it to (by default nothing is kept between runs)")
+    args = parser.parse_args()
+    initial_state = random.choice(ROOM_STATES)
     goal = "Make the room clean."
-    room_environment = BasicEnvironment(initial_state, goal)
-    agent = ReActDynamicPlanningAgent(room_environment, OPENAI_API_KEY)
+    room_environment = BasicEnvironment(initial_state)  # The goal state is "clean"
+    policy_store = PolicyStore(args.policy_store)  # Only persisted with --policy-store
+    oracle = PlanOracle(ROOM_TRANSITIONS)
+    use_oracle_planner = False  # True plans without any LLM call; False uses the oracle to validate LLM plans
+    agent = ReActDynamicPlanningAgent(room_environment, OPENAI_API_KEY, policy_store, oracle, use_oracle_planner)
 
     print(f"Initial State: {initial_state}")
     print(f"Goal: {goal}")
@@ -99,12 +445,16 @@ if __name__ == "__main__":
         # Step 1: Observation
         observation = agent.observe()
         print(f"Observation: The room is {observation}")
+        if room_environment.is_goal_state():
+            print("Goal already achieved. Nothing to plan.")
+            break
 
         # Step 2: Thought (Dynamic planning)
+        llm_calls_before = agent.llm_calls
         plan = agent.think(observation, goal)
 
         valid_actions = ["clean the room", "dust the room", "do nothing"]
-        plan = [step for step in plan if any(valid_action in step.lower() for valid_action in valid_actions)]
+        plan = [step for step in plan if PLAN_STEP_MATCHER.match(step) in valid_actions]
         print(f"Filtered Plan: {plan} (Retaining only valid actions)")
 
         if not plan or "unknown state" in plan:
@@ -115,42 +465,64 @@ if __name__ == "__main__":
         for i, step in enumerate(plan, 1):
             print(f"  {i}. {step}")
 
-        # Step 3: Action (Dynamic execution with replanning)
+        # Step 3: Action (Dynamic execution, replanning only when the outcome diverges from the plan)
         max_plan_length = 5
+        staleness_budget = 3  # Replan anyway after this many steps on the same plan
         plan = plan[:max_plan_length]
-        for step_index, step in enumerate(plan):  # Iterate through the current plan, keeping track of the step index
+        expected_states = agent.expected_states(observation, plan)  # The state each step should lead to
+        step_index = 0
+        steps_since_plan = 0
+        replans = 0
+        replans_avoided = 0
+        initial_plan = list(plan)
+        divergences = 0
+        while step_index < len(plan):
             if room_environment.is_goal_state():  # Check if the goal has already been achieved
                 print("Goal already achieved. Skipping remaining actions.")
                 break  # Exit the loop if the goal is achieved
 
-            action_result = agent.act(step, debug=True)  # Execute the current step in the plan
+            action_result = agent.act(plan[step_index], debug=True)  # Execute the current step in the plan
             print(f"Step {step_index + 1}: {action_result}")  # Print the result of the action
             print(f"Updated Environment State: {room_environment.get_state()}")  # Print the updated state of the environment
+            step_index += 1
+            steps_since_plan += 1
+
+            # Replan only if the new observation diverges from what the plan expected, or the plan is stale
+            new_observation = agent.observe()
+            diverged = new_observation != expected_states[step_index - 1]
+            stale = steps_since_plan >= staleness_budget
+            divergences += diverged
+            if not diverged and not stale:
+                replans_avoided += 1
+                print(f"Observed '{new_observation}' as expected. No replanning needed.")
+                continue
 
-            # Replanning based on new observation after each step
-            new_observation = agent.observe()  # Observe the environment *again* to get the updated state after the action
+            print(f"Replanning because the plan {'diverged' if diverged else 'is stale'}: expected '{expected_states[step_index - 1]}', observed '{new_observation}'.")
             replanned_plan = agent.think(new_observation, goal, is_replanning=True)  # Generate a *new* plan based on the updated observation
+            replans += 1
+            steps_since_plan = 0
 
             valid_actions = ["clean the room", "dust the room", "do nothing"]
-            replanned_plan = [step for step in replanned_plan if any(valid_action in step.lower() for valid_action in valid_actions)]
+            replanned_plan = [step for step in replanned_plan if PLAN_STEP_MATCHER.match(step) in valid_actions]
 
             if not replanned_plan:  # Handle Edge Case for Empty Plans
                 print("Replanning resulted in no valid actions. Continuing with the current plan.")
-                continue
-
-            if replanned_plan and replanned_plan != plan[step_index + 1:]:  # Check if a valid new plan exists AND if it's different from the remaining part of the current plan
-                plan = plan[:step_index + 1] + replanned_plan  # Update the plan
+            elif replanned_plan != plan[step_index:]:  # Check if the new plan is different from the remaining part of the current plan
+                plan = plan[:step_index] + replanned_plan[:max_plan_length]  # Update the plan
                 print("\033[93mReplanning Triggered!\033[0m")
                 print(f"Plan updated dynamically: {plan}")
-            elif replanned_plan and replanned_plan[0] == plan[step_index]:  # Improved comparison for redundant steps
-                print("Replanned action matches the current step. No need to re-execute.")
-            elif replanned_plan:
+            else:
                 print("Replanning did not result in any changes. Continuing with the current plan.")
+            expected_states = expected_states[:step_index] + agent.expected_states(new_observation, plan[step_index:])
+
+        print(f"LLM calls this cycle: {agent.llm_calls - llm_calls_before} (replans: {replans}, replans avoided: {replans_avoided})")
+        # The initial plan succeeded if it played out as expected and made progress
+        policy_store.record(observation, goal, initial_plan, divergences == 0 and made_progress(observation, room_environment))
 
         if not room_environment.is_goal_state():
             print("This cycle's plan execution is complete, but the goal is not yet achieved.")
 
-        print(f"Cycle {cycle + 1} Summary: Plan Executed = {plan[:step_index + 1] if step_index < len(plan) else plan}, Remaining Plan = {plan[step_index + 1:] if step_index < len(plan) else []}, State = {room_environment.get_state()}")
+        print(f"Cycle {cycle + 1} Summary: Plan Executed = {plan[:step_index]}, Remaining Plan = {plan[step_index:]}, State = {room_environment.get_state()}")
         if room_environment.is_goal_state():
             print("Goal achieved!")
             break
@@ -160,3 +532,6 @@ if __name__ == "__main__":
         print("\nGoal achieved!")
     else:
         print("\nGoal not achieved. Final state:", room_environment.get_state())
+
+    policy_store.save()
+    print(f"Policy store: {policy_store.served} plans served without the LLM, {policy_store.sampled} sampled for drift, {policy_store.drift} drifted")
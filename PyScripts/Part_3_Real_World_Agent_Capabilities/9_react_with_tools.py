@@ -1,14 +1,90 @@
 # 9_react_with_tools.py
 # Demonstrates how a ReAct agent interacts with a simple search & calculator tool.
 
+import ast
+import functools
+import hashlib
+import json
 import re
 import os
-from langchain.llms import OpenAI
-from dotenv import load_dotenv
-load_dotenv()
+import sys
+import textwrap
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 
+class LazyOpenAI:
+    """
+    Stands in for langchain's OpenAI LLM and creates the real one on first use.
+
+    langchain (and the .env file, when no API key was given) are only loaded by the first
+    call, normally the first think(), so importing this module and creating agents stays
+    cheap on paths that never call the LLM.
+
+    Attributes:
+        kwargs (dict): The arguments for langchain's OpenAI(...).
+        model_name (str): The model the real LLM will use, known without importing langchain.
+        temperature (float): Its sampling temperature, likewise.
+        llm: The real LLM, once created.
+    """
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.model_name = kwargs.get("model_name", "gpt-3.5-turbo-instruct")  # langchain's defaults
+        self.temperature = kwargs.get("temperature", 0.7)
+        self.llm = None
+        self.lock = threading.Lock()
+
+    def resolve(self):
+        """Imports langchain and creates the real LLM (only once, even from several threads)."""
+        with self.lock:
+            if self.llm is None:
+                from langchain.llms import OpenAI
+                kwargs = dict(self.kwargs)
+                if not kwargs.get("openai_api_key"):
+                    from dotenv import load_dotenv
+                    load_dotenv()
+                    kwargs["openai_api_key"] = os.getenv("OPENAI_API_KEY")
+                self.llm = OpenAI(**kwargs)
+        return self.llm
+
+    def __call__(self, prompt, *args, **kwargs):
+        return self.resolve()(prompt, *args, **kwargs)
+
+    def stream(self, prompt, *args, **kwargs):
+        return self.resolve().stream(prompt, *args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in ("kwargs", "model_name", "temperature", "llm", "lock"):  # Not set yet (e.g. while unpickling)
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+class PromptBuilder:
+    """
+    Builds prompts as a byte-stable static prefix followed by a dynamic suffix.
+
+    LLM providers and local inference servers reuse the work done on a prompt prefix they
+    have already seen, so everything that never changes between calls (instructions, tools,
+    examples) goes first and the per-call sections follow, least volatile first.
+
+    Attributes:
+        static_prefix (str): The fixed start of every prompt.
+        cue (str): The line the model completes (e.g. "Action:").
+        fingerprint (str): A short hash of the static prefix; it must not change between calls.
+    """
+    def __init__(self, static_prefix, cue):
+        self.static_prefix = textwrap.dedent(static_prefix).strip() + "\n"
+        self.cue = cue
+        self.fingerprint = hashlib.sha256(self.static_prefix.encode("utf-8")).hexdigest()[:16]
+
+    def build(self, *sections):
+        """Returns the static prefix, then each (label, value) section in order, then the cue."""
+        dynamic_suffix = "".join(f"\n{label}: {value}" for label, value in sections)
+        return f"{self.static_prefix}{dynamic_suffix}\n\n{self.cue}"
+
 class BasicEnvironment:
     def __init__(self):
         self.state = ""
@@ -34,17 +110,139 @@ class ReActAgent:
             print(f"Executing action: {step}")
         return "Action completed."
 
+class SafeArithmetic:
+    """
+    A safe arithmetic evaluator: expressions are parsed once into a whitelisted AST
+    (numbers, variables, + - * / // % ** and parentheses), compiled, and cached by text.
+
+    The batch API evaluates many expressions with NumPy by grouping those that differ
+    only in their numbers ("10 * 3", "7 * 2.5", ...) and evaluating each group once over
+    arrays of its constants.
+    """
+    ALLOWED_NODES = (
+        ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+        ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.UAdd, ast.USub,
+    )
+    MAX_EXPONENT = 1000  # Rejects exponents like 10 ** 10 ** 10 that would hang the process
+    MAX_INT_BITS = 14_000  # Integer results must stay printable (Python's int-to-str limit is 4300 digits)
+
+    class GuardPowers(ast.NodeTransformer):
+        """Turns every `a ** b` into `_pow(a, b)`, so operand sizes are checked at evaluation time."""
+        def visit_BinOp(self, node):
+            self.generic_visit(node)
+            if isinstance(node.op, ast.Pow):
+                call = ast.Call(func=ast.Name(id="_pow", ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+                return ast.copy_location(call, node)
+            return node
+
+    def __init__(self, cache_size=4096):
+        self._compile = functools.lru_cache(maxsize=cache_size)(self._compile_uncached)
+        self._template = functools.lru_cache(maxsize=cache_size)(self._template_uncached)
+
+    def _parse(self, expression):
+        tree = ast.parse(expression.strip(), mode="eval")
+        for node in ast.walk(tree):
+            if not isinstance(node, self.ALLOWED_NODES):
+                raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+            if isinstance(node, ast.Constant) and (isinstance(node.value, bool) or not isinstance(node.value, (int, float))):
+                raise ValueError(f"Unsupported constant: {node.value!r}")
+        return tree
+
+    @classmethod
+    def _pow(cls, base, exponent):
+        """`base ** exponent`, refusing exponents over MAX_EXPONENT and integer results over MAX_INT_BITS bits."""
+        if isinstance(exponent, (int, float)):  # Arrays (batch evaluation) are float64 and cannot hang
+            if abs(exponent) > cls.MAX_EXPONENT:
+                raise ValueError("Exponent too large")
+            if isinstance(base, int) and isinstance(exponent, int) and (abs(base).bit_length() - 1) * exponent > cls.MAX_INT_BITS:
+                raise ValueError("Power too large")
+        return base ** exponent
+
+    def _to_code(self, tree):
+        return compile(ast.fix_missing_locations(self.GuardPowers().visit(tree)), "<arithmetic>", "eval")
+
+    def _compile_uncached(self, expression):
+        return self._to_code(self._parse(expression))
+
+    def _template_uncached(self, expression):
+        """Replaces every number with a placeholder variable; returns (template key, code, constants)."""
+        constants = []
+        tree = self._parse(expression)
+        if any(isinstance(node, ast.Name) for node in ast.walk(tree)):
+            raise ValueError("Variables are not supported in batch evaluation")
+
+        class ReplaceConstants(ast.NodeTransformer):
+            def visit_Constant(self, node):
+                constants.append(node.value)
+                return ast.copy_location(ast.Name(id=f"_c{len(constants) - 1}", ctx=ast.Load()), node)
+
+        template = ast.fix_missing_locations(ReplaceConstants().visit(tree))
+        return ast.dump(template), self._to_code(template), tuple(constants)
+
+    def evaluate(self, expression, **variables):
+        """
+        Evaluates a single expression.
+
+        Args:
+            expression (str): The arithmetic expression, e.g. "(2 + 3) * x".
+            **variables: Values (numbers or NumPy arrays) for the names used in the expression.
+
+        Raises:
+            SyntaxError, ValueError: If the expression is not valid, whitelisted arithmetic, or
+                an integer result would exceed MAX_INT_BITS bits.
+            NameError: If the expression uses a variable that was not bound.
+            ZeroDivisionError: On division by zero with plain numbers.
+        """
+        result = eval(self._compile(expression), {"__builtins__": {}, "_pow": self._pow}, variables)
+        if isinstance(result, int) and result.bit_length() > self.MAX_INT_BITS:
+            raise ValueError("Result too large")
+        return result
+
+    def evaluate_many(self, expressions):
+        """
+        Evaluates many expressions at once with NumPy.
+
+        Expressions with the same shape are evaluated together over float64 arrays of their
+        constants, so division by zero yields inf/nan instead of raising.
+
+        Returns:
+            np.ma.MaskedArray: One float64 result per expression, in input order; expressions
+                that are not valid arithmetic (or use variables) are masked.
+        """
+        import numpy as np  # Only batch evaluation needs NumPy, which takes ~140 ms to import
+        results = np.ma.masked_all(len(expressions), dtype=np.float64)
+        groups = {}  # template key -> (code, [indices], [constants])
+        for index, expression in enumerate(expressions):
+            try:
+                key, code, constants = self._template(expression)
+            except (SyntaxError, ValueError):
+                continue  # Stays masked
+            group = groups.setdefault(key, (code, [], []))
+            group[1].append(index)
+            group[2].append(constants)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            for code, indices, constants in groups.values():
+                columns = np.array(constants, dtype=np.float64).reshape(len(indices), -1).T
+                variables = {f"_c{i}": column for i, column in enumerate(columns)}
+                results[indices] = eval(code, {"__builtins__": {}, "_pow": self._pow}, variables)
+        return results
+
 class CalculatorTool:
-    """A simple calculator tool."""
+    """A simple calculator tool, backed by a safe arithmetic evaluator."""
+
+    def __init__(self):
+        self.evaluator = SafeArithmetic()
 
     def calculate(self, expression):
         try:
-            # Use a safer evaluator (replace with a suitable library in real applications)
-            import ast
-            result = ast.literal_eval(expression)
-            return result
-        except (SyntaxError, ValueError):
+            return self.evaluator.evaluate(expression)
+        except (SyntaxError, ValueError, TypeError, NameError, ZeroDivisionError, OverflowError):
             return "Invalid calculation."
+
+    def calculate_many(self, expressions):
+        """Evaluates a batch of expressions with NumPy (see SafeArithmetic.evaluate_many)."""
+        results = self.evaluator.evaluate_many(expressions)
+        return ["Invalid calculation." if invalid else float(result) for result, invalid in zip(results.data, results.mask)]
         
 class SearchTool:
     def search(self, query):
@@ -54,24 +252,99 @@ class SearchTool:
         else:
             return "Information not found."
 
+class ToolResultCache:
+    """
+    Caches tool results by normalized query, with optional TTL and size-based (LRU) eviction.
+
+    Use ttl_seconds=None for pure tools (like the calculator) whose results never change,
+    and a finite TTL for tools whose answers go stale (like search).
+    """
+    def __init__(self, ttl_seconds=None, max_entries=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # normalized query -> (result, stored_at), oldest first
+        self.lock = threading.Lock()  # Tool calls may run on a thread pool (see act_plan)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query):
+        """Lowercases the query and collapses whitespace, so trivially different queries share an entry."""
+        return " ".join(str(query).lower().split())
+
+    def get(self, query):
+        """Returns the cached result for the query, or None if it is missing or expired."""
+        key = self.normalize(query)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                result, stored_at = entry
+                if self.ttl_seconds is None or time.time() - stored_at <= self.ttl_seconds:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self.entries[key]  # Expired
+            self.misses += 1
+            return None
+
+    def put(self, query, result):
+        key = self.normalize(query)
+        with self.lock:
+            self.entries[key] = (result, time.time())
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)  # Evict the least recently used result
+
+class ToolStepRecord:
+    """
+    One tool call in the agent's memory: the tool (as an id interned by its ToolMemory), its query and its raw result.
+
+    Results keep their own type (a calculator result stays a number); records are only
+    turned into prompt text by ToolMemory.render(), when think() needs the history.
+    """
+    __slots__ = ("tool_id", "query", "result")
+
+    def __init__(self, tool_id, query, result):
+        self.tool_id = tool_id
+        self.query = query
+        self.result = result
+
+class ToolMemory:
+    """The tool calls an agent has made, as ToolStepRecords whose tool names are interned per memory."""
+    def __init__(self):
+        self.records = []
+        self.tool_names = []  # Tool id -> tool name
+        self.tool_ids = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def record(self, tool_name, query, result):
+        tool_id = self.tool_ids.get(tool_name)
+        if tool_id is None:
+            tool_id = self.tool_ids[tool_name] = len(self.tool_names)
+            self.tool_names.append(tool_name)
+        self.records.append(ToolStepRecord(tool_id, query, result))
+
+    def render(self):
+        """Returns the tool calls as prompt text, one per line."""
+        return "\n".join(f"{self.tool_names[record.tool_id]}({record.query}) -> {record.result}" for record in self.records)
+
 class ReActAgentWithTools(ReActAgent): 
-    def __init__(self, environment, tools, llm): # tools is a dictionary
+    def __init__(self, environment, tools, llm, tool_caches=None): # tools is a dictionary
         super().__init__(environment)
         self.tools = tools # Store tools in a dictionary
         self.llm = llm
-        self.memory = []  # List to store tool results
-
-    def think(self, observation, goal):
-        """Uses the LLM to generate a plan."""
-        prompt = f"""
+        self.memory = ToolMemory()  # The tool calls made so far
+        self.tool_caches = tool_caches or {}  # Tool name -> ToolResultCache; tools without an entry are not cached
+        # The tool list and examples are fixed for this agent, so they form the static prompt prefix
+        self.prompt_builder = PromptBuilder(f"""
+        You are an agent that uses tools to achieve a goal. Write a plan with one tool call per step.
         Tools Available: {list(self.tools.keys())}
-        Goal: {goal}
-        Observation: {observation}
 
-        Plan:
-        """
-        
-        """
         # Example 1: Search for capital
         Goal: What is the capital of France?
         Plan:
@@ -86,14 +359,43 @@ class ReActAgentWithTools(ReActAgent):
         Goal: What is the population of Paris divided by 2?
         Plan:
         1. Use SearchTool: Population of Paris
-        2. Use Calculator: [Result from SearchTool] / 2
+        2. Use Calculator: [Result from step 1] / 2
 
-        Your Plan:
-        """
+        # Example 4: Independent searches (run in parallel)
+        Goal: What is the total population of London and Paris?
+        Plan:
+        1. Use SearchTool: Population of London
+        2. Use SearchTool: Population of Paris
+        3. Use Calculator: [Result from step 1] + [Result from step 2]
+        """, cue="Your Plan:")
+
+    def think(self, observation, goal):
+        """Uses the LLM to generate a plan."""
+        sections = [("Goal", goal), ("Observation", observation)]
+        if self.memory:
+            sections.append(("Previous tool results", "\n" + self.memory.render()))
+        prompt = self.prompt_builder.build(*sections)
+        self.last_prefix_fingerprint = self.prompt_builder.fingerprint
         llm_output = self.llm(prompt)
         plan = [step.strip() for step in llm_output.strip().split('\n') if step]
         return plan
 
+    def run_tool(self, tool_name, query, debug=True):
+        """Calls a tool (or its cache) with a fully substituted query and returns the result."""
+        tool = self.tools[tool_name]
+        cache = self.tool_caches.get(tool_name)
+        result = cache.get(query) if cache else None
+        if result is not None:
+            if debug:
+                print(f"{tool_name} Result (cached): {result}")
+            return result
+        result = tool.calculate(query) if hasattr(tool, 'calculate') else tool.search(query)
+        if debug:
+            print(f"{tool_name} Result: {result}")
+        if cache:
+            cache.put(query, result)
+        return result
+
     def act(self, step, debug=True):
         if debug:
             print(f"Executing step: {step}")
@@ -102,28 +404,231 @@ class ReActAgentWithTools(ReActAgent):
                 query = step.split(f"Use {tool_name}: ")[1].strip()
                 if tool_name == "Calculator" and "[Result from SearchTool]" in query:
                     if self.memory:
-                        query = query.replace("[Result from SearchTool]", self.memory[-1])
+                        query = query.replace("[Result from SearchTool]", str(self.memory[-1].result))
                     else:
                         return "Error: No previous result in memory for calculation."
-                result = tool.calculate(query) if hasattr(tool, 'calculate') else tool.search(query)
-                print(f"{tool_name} Result: {result}")
-                self.memory.append(result)  # Update memory with the latest result
+                result = self.run_tool(tool_name, query)
+                self.memory.record(tool_name, query, result)  # Update memory with the latest result
                 return result
         return super().act(step, debug)
 
+    def tool_call(self, step):
+        """Returns (tool name, query) for a plan step that uses a tool, or None."""
+        for tool_name in self.tools:
+            if f"Use {tool_name}:" in step:
+                return tool_name, step.split(f"Use {tool_name}:")[1].strip()
+        return None
+
+    def build_plan_graph(self, plan):
+        """
+        Turns the tool steps of a plan into a dependency graph.
+
+        Lines that use no tool (such as "Plan:") are dropped first. Steps refer to earlier
+        results explicitly with "[Result from step N]", where N is the number the plan gives
+        the step ("2. Use ..."); in a plan without numbers, N is the step's position among
+        the tool steps. The older "[Result from SearchTool]" form refers to the latest
+        earlier step that used that tool.
+
+        Returns:
+            list: One dict per tool step with its position, number, tool name, query, the
+                positions it depends on and the step numbers it refers to that do not exist.
+
+        Raises:
+            ValueError: If two steps have the same number.
+        """
+        nodes = []
+        for step in plan:
+            call = self.tool_call(step)
+            if call is None:
+                continue
+            numbered = re.match(r"\s*(\d+)[.)]", step)
+            nodes.append({
+                "position": len(nodes), "number": int(numbered.group(1)) if numbered else None, "step": step,
+                "tool_name": call[0], "query": call[1], "references": {}, "depends_on": set(), "unknown": [],
+            })
+        if all(node["number"] is None for node in nodes):
+            for node in nodes:
+                node["number"] = node["position"] + 1
+        position_of_number = {}
+        for node in nodes:
+            if node["number"] is None:
+                continue
+            if node["number"] in position_of_number:
+                raise ValueError(f"The plan has more than one step {node['number']}.")
+            position_of_number[node["number"]] = node["position"]
+
+        last_step_for_tool = {}
+        for node in nodes:
+            for reference in re.findall(r"\[Result from [^\]]+\]", node["query"]):
+                target = reference[len("[Result from "):-1]
+                step_number = re.fullmatch(r"step (\d+)", target)
+                if step_number:
+                    if int(step_number.group(1)) in position_of_number:
+                        node["references"][reference] = position_of_number[int(step_number.group(1))]
+                    else:
+                        node["unknown"].append(int(step_number.group(1)))
+                elif target in last_step_for_tool:
+                    node["references"][reference] = last_step_for_tool[target]
+            node["depends_on"] = set(node["references"].values())
+            last_step_for_tool[node["tool_name"]] = node["position"]
+        return nodes
+
+    def act_plan(self, plan, max_workers=4, debug=True):
+        """
+        Executes the tool steps of a plan, running steps whose dependencies are met concurrently on a thread pool.
+
+        Independent tool calls (e.g. several searches) overlap, so the plan takes about as long as
+        its slowest chain of dependent steps instead of the sum of all steps.
+
+        Returns:
+            list: The result of every tool step, in plan order (lines that use no tool are skipped).
+
+        Raises:
+            ValueError: If two steps have the same number.
+        """
+        nodes = self.build_plan_graph(plan)
+        results = {}  # position -> result
+        pending = list(nodes)
+        running = {}  # future -> node
+
+        def run(node):
+            if debug:
+                print(f"Executing step: {node['step']}")
+            query = node["query"]
+            for reference, position in node["references"].items():
+                query = query.replace(reference, str(results[position]))
+            return self.run_tool(node["tool_name"], query, debug)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while pending or running:
+                for node in list(pending):
+                    if node["unknown"]:
+                        results[node["position"]] = f"Error: Step '{node['step']}' refers to unknown steps {sorted(node['unknown'])}."
+                        pending.remove(node)
+                    elif node["depends_on"] <= results.keys():
+                        running[pool.submit(run, node)] = node
+                        pending.remove(node)
+                if not running:
+                    break  # Only steps with circular references are left
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)["position"]] = future.result()
+
+        ordered = [results.get(node["position"], f"Error: Step '{node['step']}' could not be scheduled.") for node in nodes]
+        for node, result in zip(nodes, ordered):
+            self.memory.record(node["tool_name"], node["query"], result)
+        return ordered
+
+# --- Batch runner: shard a goals file across processes ---
+
+_worker_tools = None  # (tools, tool_caches, llm), created once per worker process
+
+def _init_worker():
+    global _worker_tools
+    tools = {"SearchTool": SearchTool(), "Calculator": CalculatorTool()}
+    tool_caches = {
+        "SearchTool": ToolResultCache(ttl_seconds=5 * 60),
+        "Calculator": ToolResultCache(ttl_seconds=None),
+    }
+    _worker_tools = (tools, tool_caches, LazyOpenAI(temperature=0, openai_api_key=OPENAI_API_KEY))
+
+def run_goal(index, goal):
+    """Runs one goal with a fresh agent (so no memory leaks between goals) and returns a JSON-ready record."""
+    tools, tool_caches, llm = _worker_tools
+    environment = BasicEnvironment()
+    agent = ReActAgentWithTools(environment, tools, llm, tool_caches)
+    record = {"index": index, "goal": goal}
+    try:
+        plan = agent.think(environment.get_state(), goal)
+        results = agent.act_plan(plan, debug=False)
+        record.update(plan=plan, results=results, answer=results[-1] if results else None)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+def completed_indices(results_path):
+    """
+    Reads the indices already written to a results file, so an interrupted run can resume.
+
+    A last line cut short by the interruption is removed, so that goal is simply run again.
+    """
+    done = set()
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path, "rb+") as results_file:
+        complete_bytes = 0
+        for line in results_file:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["index"])
+            except (ValueError, KeyError):
+                pass
+            complete_bytes += len(line)
+        results_file.truncate(complete_bytes)
+    return done
+
+def run_goals_file(goals_path, results_path, processes=None, max_in_flight=256):
+    """
+    Runs every goal in `goals_path` (one per line) across a process pool.
+
+    Results are appended (and flushed) to `results_path` as JSON lines as soon as each goal
+    finishes, each with the goal's original line index. Goals already present in `results_path` are skipped, so
+    re-running the same command resumes an interrupted run. At most `max_in_flight` goals
+    are queued at once, so goal files of any size are streamed rather than loaded.
+
+    Returns:
+        int: The number of goals run in this invocation.
+    """
+    done = completed_indices(results_path)
+    completed = 0
+    with open(goals_path) as goals_file, open(results_path, "a") as results_file, \
+            ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+        def write(future):
+            results_file.write(json.dumps(future.result(), default=str) + "\n")
+            results_file.flush()  # A result on disk is never rerun on resume
+
+        goals = ((index, line.strip()) for index, line in enumerate(goals_file) if line.strip() and index not in done)
+        running = set()
+        for index, goal in goals:
+            if len(running) >= max_in_flight:
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+            else:
+                finished, running = wait(running, timeout=0)  # Write whatever has finished, without blocking
+            for future in finished:
+                write(future)
+                completed += 1
+            running.add(pool.submit(run_goal, index, goal))
+        for future in as_completed(running):
+            write(future)
+            completed += 1
+    return completed
+
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()  # Read .env only when run as a script; importing the module stays cheap
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    if len(sys.argv) >= 3:  # Batch mode: python 9_react_with_tools.py goals.txt results.jsonl [processes]
+        processes = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        count = run_goals_file(sys.argv[1], sys.argv[2], processes)
+        print(f"Ran {count} goals, results in {sys.argv[2]}")
+        sys.exit(0)
+
     environment = BasicEnvironment()
     search_tool = SearchTool()
     calculator_tool = CalculatorTool()
-    llm = OpenAI(temperature=0, openai_api_key=OPENAI_API_KEY)
+    llm = LazyOpenAI(temperature=0, openai_api_key=OPENAI_API_KEY)
 
     # Create the agent with the tools
     tools = {
         "SearchTool": search_tool,
         "Calculator": calculator_tool
     }
-    agent = ReActAgentWithTools(environment, tools, llm)
+    tool_caches = {
+        "SearchTool": ToolResultCache(ttl_seconds=5 * 60),  # Search results can go stale
+        "Calculator": ToolResultCache(ttl_seconds=None),  # Pure function: cache forever
+    }
 
     goals = [
         "What is the population of London divided by 10?",
@@ -138,13 +643,26 @@ if __name__ == "__main__":
         "What is (10 + 5) / (2 + 1)",
     ]
 
+    # Calculator input comes from the LLM, so oversized powers are refused instead of computed
+    print(f"Calculator on (9 ** 999) ** 999: {calculator_tool.calculate('(9 ** 999) ** 999')}")
+
     for goal in goals:
         print(f"\nGoal: {goal}")
+        agent = ReActAgentWithTools(environment, tools, llm, tool_caches) # Fresh memory for each goal; caches are shared
         plan = agent.think(environment.get_state(), goal)
         print(f"Plan: {plan}")
-        for step in plan:
-            result = agent.act(step)
-            print(f"Result: {result}")
-            environment.change_state(result)
+        try:
+            results = agent.act_plan(plan) # Independent steps run concurrently; results come back in plan order
+        except ValueError as e:
+            print(f"Invalid plan: {e}")
+            continue
+        tool_steps = [step for step in plan if agent.tool_call(step)]
+        for step, result in zip(tool_steps, results):
+            print(f"Result of '{step}': {result}")
+        if results:
+            environment.change_state(results[-1])
         print(f"Final Environment State: {environment.get_state()}")
-        print("-" * 20)
\ No newline at end of file
+        print("-" * 20)
+
+    for tool_name, cache in tool_caches.items():
+        print(f"{tool_name} cache: {cache.hits} hits, {cache.misses} misses")
\ No newline at end of file
@@ -2,10 +2,16 @@ from langchain import hub
 from langchain_community.llms import OpenAI
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.prompts import StringPromptTemplate
-from langchain.memory import ConversationBufferMemory
+from langchain.memory import ConversationSummaryBufferMemory
 from langchain.tools import tool
 from dotenv import load_dotenv
+import ast
+import functools
 import os
+import re
+import time
+import zlib
+import numpy as np
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -25,16 +31,134 @@ def search(query: str) -> str:
     else:
         return "I couldn't find information on that."
 
+class SafeArithmetic:
+    """
+    A safe arithmetic evaluator: expressions are parsed once into a whitelisted AST
+    (numbers, variables, + - * / // % ** and parentheses), compiled, and cached by text.
+
+    The batch API evaluates many expressions with NumPy by grouping those that differ
+    only in their numbers ("10 * 3", "7 * 2.5", ...) and evaluating each group once over
+    arrays of its constants.
+    """
+    ALLOWED_NODES = (
+        ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+        ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.UAdd, ast.USub,
+    )
+    MAX_EXPONENT = 1000  # Rejects exponents like 10 ** 10 ** 10 that would hang the process
+    MAX_INT_BITS = 14_000  # Integer results must stay printable (Python's int-to-str limit is 4300 digits)
+
+    class GuardPowers(ast.NodeTransformer):
+        """Turns every `a ** b` into `_pow(a, b)`, so operand sizes are checked at evaluation time."""
+        def visit_BinOp(self, node):
+            self.generic_visit(node)
+            if isinstance(node.op, ast.Pow):
+                call = ast.Call(func=ast.Name(id="_pow", ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+                return ast.copy_location(call, node)
+            return node
+
+    def __init__(self, cache_size=4096):
+        self._compile = functools.lru_cache(maxsize=cache_size)(self._compile_uncached)
+        self._template = functools.lru_cache(maxsize=cache_size)(self._template_uncached)
+
+    def _parse(self, expression):
+        tree = ast.parse(expression.strip(), mode="eval")
+        for node in ast.walk(tree):
+            if not isinstance(node, self.ALLOWED_NODES):
+                raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+            if isinstance(node, ast.Constant) and (isinstance(node.value, bool) or not isinstance(node.value, (int, float))):
+                raise ValueError(f"Unsupported constant: {node.value!r}")
+        return tree
+
+    @classmethod
+    def _pow(cls, base, exponent):
+        """`base ** exponent`, refusing exponents over MAX_EXPONENT and integer results over MAX_INT_BITS bits."""
+        if isinstance(exponent, (int, float)):  # Arrays (batch evaluation) are float64 and cannot hang
+            if abs(exponent) > cls.MAX_EXPONENT:
+                raise ValueError("Exponent too large")
+            if isinstance(base, int) and isinstance(exponent, int) and (abs(base).bit_length() - 1) * exponent > cls.MAX_INT_BITS:
+                raise ValueError("Power too large")
+        return base ** exponent
+
+    def _to_code(self, tree):
+        return compile(ast.fix_missing_locations(self.GuardPowers().visit(tree)), "<arithmetic>", "eval")
+
+    def _compile_uncached(self, expression):
+        return self._to_code(self._parse(expression))
+
+    def _template_uncached(self, expression):
+        """Replaces every number with a placeholder variable; returns (template key, code, constants)."""
+        constants = []
+        tree = self._parse(expression)
+        if any(isinstance(node, ast.Name) for node in ast.walk(tree)):
+            raise ValueError("Variables are not supported in batch evaluation")
+
+        class ReplaceConstants(ast.NodeTransformer):
+            def visit_Constant(self, node):
+                constants.append(node.value)
+                return ast.copy_location(ast.Name(id=f"_c{len(constants) - 1}", ctx=ast.Load()), node)
+
+        template = ast.fix_missing_locations(ReplaceConstants().visit(tree))
+        return ast.dump(template), self._to_code(template), tuple(constants)
+
+    def evaluate(self, expression, **variables):
+        """
+        Evaluates a single expression.
+
+        Args:
+            expression (str): The arithmetic expression, e.g. "(2 + 3) * x".
+            **variables: Values (numbers or NumPy arrays) for the names used in the expression.
+
+        Raises:
+            SyntaxError, ValueError: If the expression is not valid, whitelisted arithmetic, or
+                an integer result would exceed MAX_INT_BITS bits.
+            NameError: If the expression uses a variable that was not bound.
+            ZeroDivisionError: On division by zero with plain numbers.
+        """
+        result = eval(self._compile(expression), {"__builtins__": {}, "_pow": self._pow}, variables)
+        if isinstance(result, int) and result.bit_length() > self.MAX_INT_BITS:
+            raise ValueError("Result too large")
+        return result
+
+    def evaluate_many(self, expressions):
+        """
+        Evaluates many expressions at once with NumPy.
+
+        Expressions with the same shape are evaluated together over float64 arrays of their
+        constants, so division by zero yields inf/nan instead of raising.
+
+        Returns:
+            np.ma.MaskedArray: One float64 result per expression, in input order; expressions
+                that are not valid arithmetic (or use variables) are masked.
+        """
+        results = np.ma.masked_all(len(expressions), dtype=np.float64)
+        groups = {}  # template key -> (code, [indices], [constants])
+        for index, expression in enumerate(expressions):
+            try:
+                key, code, constants = self._template(expression)
+            except (SyntaxError, ValueError):
+                continue  # Stays masked
+            group = groups.setdefault(key, (code, [], []))
+            group[1].append(index)
+            group[2].append(constants)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            for code, indices, constants in groups.values():
+                columns = np.array(constants, dtype=np.float64).reshape(len(indices), -1).T
+                variables = {f"_c{i}": column for i, column in enumerate(columns)}
+                results[indices] = eval(code, {"__builtins__": {}, "_pow": self._pow}, variables)
+        return results
+
+arithmetic = SafeArithmetic()
+
 @tool
 def calculator(expression: str) -> str:
     """Calculates a mathematical expression."""
     print(f"Calculating: {expression}")  # Detailed explanation
     try:
-        result = eval(expression)  # Use safer alternatives in production!
+        result = arithmetic.evaluate(expression)  # Whitelisted arithmetic only, no eval of arbitrary code
         return str(result)
     except ZeroDivisionError: # Introduce Errors
         return "Error: Division by zero is not allowed."
-    except (SyntaxError, TypeError, NameError):
+    except (SyntaxError, ValueError, TypeError, NameError, OverflowError):
         return "Error: Invalid calculation."
 
 # --- Define Prompt and Tools ---
@@ -60,7 +184,32 @@ tools = [search, calculator]
 
 # --- Initialize Agent and Memory ---
 
-memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+class TokenBudgetMemory(ConversationSummaryBufferMemory):
+    """
+    Conversation memory with a token budget for the prompt.
+
+    Recent turns are kept verbatim; once they exceed `max_token_limit`, the oldest turns are
+    folded into a running summary, which the LLM updates incrementally from the previous
+    summary and the turns being pruned. The size of the history injected into the last
+    prompt is kept in `last_prompt_tokens`.
+    """
+    last_prompt_tokens: int = 0
+
+    def load_memory_variables(self, inputs):
+        variables = super().load_memory_variables(inputs)
+        history = variables[self.memory_key]
+        if self.return_messages:
+            self.last_prompt_tokens = self.llm.get_num_tokens_from_messages(history)
+        else:
+            self.last_prompt_tokens = self.llm.get_num_tokens(history)
+        return variables
+
+memory = TokenBudgetMemory(
+    llm=OpenAI(temperature=0, openai_api_key=OPENAI_API_KEY),  # Used to count tokens and update the summary
+    max_token_limit=1000,
+    memory_key="chat_history",
+    return_messages=True,
+)
 
 agent = create_react_agent(
     llm=OpenAI(temperature=0, openai_api_key=OPENAI_API_KEY),
@@ -70,23 +219,132 @@ agent = create_react_agent(
     verbose=True,
 )
 
+# --- Answer Cache ---
+
+class SemanticAnswerCache:
+    """
+    A local cache of answers to earlier goals, looked up by text similarity.
+
+    Goals are embedded with a hashing vectorizer (word unigrams and character trigrams
+    hashed into `dimensions` signed buckets, L2-normalized), so no embedding service is
+    needed, and looked up with a single NumPy matrix-vector product over all entries.
+    Paraphrases such as "What is the capital of France?" and "What's France's capital?"
+    hit the same entry. A similar entry is still rejected when its numbers or named
+    entities (capitalized words inside a sentence) differ, so "10 * 5 + 3" never reuses
+    the answer to "10 * 5 + 4", nor "population of Paris divided by 2" the answer for London.
+
+    Attributes:
+        threshold (float): Minimum cosine similarity for a hit.
+        ttl_seconds (float): Seconds an answer stays valid, or None to keep it until evicted.
+        capacity (int): Maximum number of entries; the least recently used one is evicted.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that were not.
+    """
+    TOKEN_PATTERN = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+    NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+    ENTITY_PATTERN = re.compile(r"(?<![.?!]\s)(?<!^)\b[A-Z][A-Za-z]*")  # Capitalized, not starting a sentence
+    STOP_WORDS = frozenset(["what", "which", "s", "is", "are", "the", "a", "an", "of", "for", "in", "me", "tell", "please"])
+
+    def __init__(self, threshold=0.75, ttl_seconds=3600, capacity=1024, dimensions=2048):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.capacity = capacity
+        self.dimensions = dimensions
+        self.vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.key_terms = [None] * capacity  # (numbers, named entities) a similar goal must share
+        self.answers = [None] * capacity
+        self.created = np.zeros(capacity)
+        self.last_used = np.full(capacity, -np.inf)  # -inf marks a free slot
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, text):
+        """Returns the normalized hashing-vectorizer embedding of a text."""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        words = [word for word in self.TOKEN_PATTERN.findall(text.lower()) if word not in self.STOP_WORDS]
+        features = list(words)
+        for word in words:
+            padded = f" {word} "
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        for feature in features:
+            bucket = zlib.crc32(feature.encode("utf-8"))
+            vector[bucket % self.dimensions] += 1.0 if bucket & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _key_terms(self, text):
+        entities = {word.lower() for word in self.ENTITY_PATTERN.findall(text)} - self.STOP_WORDS
+        return tuple(self.NUMBER_PATTERN.findall(text)), frozenset(entities)
+
+    def get(self, goal):
+        """Returns the cached answer for a similar goal, or None."""
+        now = time.time()
+        similarities = self.vectors @ self.embed(goal)
+        valid = np.isfinite(self.last_used)
+        if self.ttl_seconds is not None:
+            valid &= now - self.created < self.ttl_seconds
+        key_terms = self._key_terms(goal)
+        for slot in np.argsort(np.where(valid, similarities, -np.inf))[::-1]:
+            if not valid[slot] or similarities[slot] < self.threshold:
+                break
+            if self.key_terms[slot] == key_terms:
+                self.last_used[slot] = now
+                self.hits += 1
+                return self.answers[slot]
+        self.misses += 1
+        return None
+
+    def put(self, goal, answer):
+        """Stores an answer, reusing an expired slot or evicting the least recently used entry."""
+        now = time.time()
+        slot = int(np.argmin(self.last_used))
+        if self.ttl_seconds is not None:
+            expired = np.flatnonzero(np.isfinite(self.last_used) & (now - self.created >= self.ttl_seconds))
+            if len(expired) and np.isfinite(self.last_used[slot]):
+                slot = int(expired[0])
+        self.vectors[slot] = self.embed(goal)
+        self.key_terms[slot] = self._key_terms(goal)
+        self.answers[slot] = answer
+        self.created[slot] = now
+        self.last_used[slot] = now
+
+# Goals that refer to the conversation itself depend on the memory, not only on the question.
+CONVERSATION_REFERENCE = re.compile(r"\b(my|i|me|we|our|previous|earlier|before)\b", re.IGNORECASE)
+
+answer_cache = SemanticAnswerCache()
+
 # --- Agent Execution Function ---
 
 def run_agent(goal):
     print(f"\nGoal: {goal}")
-    agent_executor = AgentExecutor(agent=agent)
+    use_cache = not CONVERSATION_REFERENCE.search(goal)
+    answer = answer_cache.get(goal) if use_cache else None
+    if answer is not None:
+        memory.save_context({"goal": goal}, {"output": answer})  # Keeps memory queries answerable
+        print(f"Agent's Response (cached, no LLM call): {answer}")
+        print(f"Answer cache: {answer_cache.hits} hits, {answer_cache.misses} misses")
+        print("-" * 20)
+        return answer
+    agent_executor = AgentExecutor(agent=agent, memory=memory)
     response = agent_executor.invoke({"goal": goal})
+    if use_cache:
+        answer_cache.put(goal, response["output"])
     print(f"Agent's Response: {response}")
-    print("\nMemory Content:")
-    for message in memory.buffer:
+    print(f"\nMemory prompt size: {memory.last_prompt_tokens} tokens (budget: {memory.max_token_limit})")
+    if memory.moving_summary_buffer:
+        print(f"Summary of earlier turns: {memory.moving_summary_buffer}")
+    print("Recent turns:")
+    for message in memory.chat_memory.messages:
         print(f"{message.type}: {message.content}")
     print("-" * 20)
+    return response["output"]
 
 # --- Run Agent with Goals ---
 
 goals = [
     "What is the population of London divided by 2?",
     "What is the capital of France?",
+    "What's France's capital?", # Paraphrase, answered from the answer cache
     "What is 10 / 0?", # Introduce Errors
     "What is 10 * 5 + 3?",
     "What is the current weather in London?", # Extended Search Tool
@@ -3,12 +3,18 @@ from langchain_community.llms import OpenAI
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.prompts import StringPromptTemplate
 from langchain.chains import LLMChain, SimpleSequentialChain
-from langchain.memory import ConversationBufferMemory
 from langchain.tools import tool
 from dotenv import load_dotenv
+import heapq
+import math
 import os
 import requests
 import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from requests.adapters import HTTPAdapter
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -28,46 +34,201 @@ def get_distance(origin: str, destination: str) -> str:
     else:
         return f"Distance between {origin} and {destination} not found. (Placeholder)" # Explicitly flagged placeholder
 
+class WeatherClient:
+    """
+    An OpenWeatherMap client with a pooled keep-alive session, timeouts, a short-TTL cache
+    and single-flight coalescing of concurrent identical lookups.
+
+    Attributes:
+        requests_sent (int): Number of HTTP requests actually made.
+        cache_hits (int): Lookups answered from the cache.
+        coalesced (int): Lookups that waited for an identical in-flight request instead of sending their own.
+    """
+    def __init__(self, api_key, base_url="http://api.openweathermap.org/data/2.5/weather",
+                 connect_timeout=3.05, read_timeout=10, ttl_seconds=5 * 60, pool_size=10):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.ttl_seconds = ttl_seconds
+        self.session = requests.Session()  # Reuses keep-alive connections between calls
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cache = {}  # normalized location -> (result, fetched_at)
+        self.in_flight = {}  # normalized location -> Future shared by concurrent callers
+        self.lock = threading.Lock()
+        self.requests_sent = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def normalize(location):
+        """Lowercases the location and collapses whitespace."""
+        return " ".join(location.lower().split())
+
+    def get_weather(self, location):
+        """Returns a weather description for the location, from the cache, an in-flight request or the API."""
+        key = self.normalize(location)
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached is not None and time.time() - cached[1] <= self.ttl_seconds:
+                self.cache_hits += 1
+                return cached[0]
+            future = self.in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self.in_flight[key] = future
+            else:
+                self.coalesced += 1
+        if not is_leader:
+            return future.result()  # Wait for the identical request that is already running
+
+        try:
+            result, cacheable = self._fetch(location)
+            if cacheable:
+                with self.lock:
+                    self.cache[key] = (result, time.time())
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def _fetch(self, location):
+        """Calls the API once; returns (message, whether the message is worth caching)."""
+        with self.lock:
+            self.requests_sent += 1
+        params = {"q": location, "appid": self.api_key, "units": "metric"}
+        try:
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            if "main" not in data: # More robust API response checking
+                return f"Weather information not found for {location} (Invalid API Response).", False
+            temp = data["main"]["temp"]
+            description = data["weather"][0]["description"]
+            return f"The weather in {location} is {description} with a temperature of {temp:.1f}°C.", True
+        except requests.exceptions.Timeout:
+            return f"Error: Timed out retrieving weather data for {location}.", False
+        except requests.exceptions.RequestException as e:
+            if e.response is not None and e.response.status_code == 401:
+                return "Error: Invalid OpenWeatherMap API key.", False # Explicit API key error handling
+            return f"Error: Could not retrieve weather data: {e}", False
+        except (KeyError, IndexError, ValueError):
+            return "Error: Invalid weather data received.", False
+
+weather_client = WeatherClient(OPENWEATHERMAP_API_KEY)
+
 @tool
 def get_weather(location: str) -> str:
     """Retrieves current weather data from OpenWeatherMap API (External Tool)."""
     print(f"Getting weather for: {location}")
-    api_key = OPENWEATHERMAP_API_KEY
-    if not api_key:
+    if not OPENWEATHERMAP_API_KEY:
         return "Error: OPENWEATHERMAP_API_KEY not set in .env file."
-    url = f"http://api.openweathermap.org/data/2.5/weather?q={location}&appid={api_key}&units=metric"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        if "main" not in data: # More robust API response checking
-            return f"Weather information not found for {location} (Invalid API Response)."
-        temp = data["main"]["temp"]
-        description = data["weather"][0]["description"]
-        return f"The weather in {location} is {description} with a temperature of {temp:.1f}°C."
-    except requests.exceptions.RequestException as e:
-        if response.status_code == 401:
-            return "Error: Invalid OpenWeatherMap API key." # Explicit API key error handling
-        return f"Error: Could not retrieve weather data: {e}"
-    except (KeyError, IndexError):
-        return "Error: Invalid weather data received."
+    return weather_client.get_weather(location)
 
 
 tools = [get_distance, get_weather]
 
 # --- Define Advanced Prompt Engineering and Custom Chains ---
 
+class ConversationIndex:
+    """
+    An incrementally updated BM25 inverted index over past turns and tool results.
+
+    Adding a turn only touches the posting lists of its own terms, and a query only reads
+    the posting lists of the query terms, so both stay fast for sessions with thousands
+    of turns.
+
+    Attributes:
+        entries (list): The indexed texts, in the order they were added.
+        postings (dict): term -> list of (entry id, term frequency).
+    """
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+    STOP_WORDS = frozenset(["a", "an", "the", "is", "it", "to", "of", "in", "at", "and", "or", "what", "how",
+                            "i", "m", "me", "my", "you", "your", "was", "s", "for", "from", "like", "can"])
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.entries = []
+        self.lengths = []
+        self.total_length = 0
+        self.postings = {}
+
+    def tokenize(self, text):
+        return [token for token in self.TOKEN_PATTERN.findall(text.lower()) if token not in self.STOP_WORDS]
+
+    def add(self, text):
+        """Indexes one turn or tool result and returns its entry id."""
+        entry_id = len(self.entries)
+        terms = self.tokenize(text)
+        for term, frequency in Counter(terms).items():
+            self.postings.setdefault(term, []).append((entry_id, frequency))
+        self.entries.append(text)
+        self.lengths.append(len(terms))
+        self.total_length += len(terms)
+        return entry_id
+
+    def search(self, query, k=3):
+        """Returns the ids of the (at most) k entries with the highest BM25 score for the query."""
+        if not self.entries:
+            return []
+        num_entries = len(self.entries)
+        average_length = self.total_length / num_entries or 1
+        scores = {}
+        for term in set(self.tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (num_entries - len(posting) + 0.5) / (len(posting) + 0.5))
+            for entry_id, frequency in posting:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[entry_id] / average_length)
+                scores[entry_id] = scores.get(entry_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(k, scores, key=scores.get)
+
+    def render(self, query, top_k=3, recent=4):
+        """Returns the top-k relevant entries plus the most recent ones, in conversation order."""
+        selected = set(self.search(query, top_k)) | set(range(max(0, len(self.entries) - recent), len(self.entries)))
+        if not selected:
+            return "No previous conversation."
+        return "\n".join(f"[Turn {entry_id + 1}] {self.entries[entry_id]}" for entry_id in sorted(selected))
+
+    def __len__(self):
+        return len(self.entries)
+
+history_index = ConversationIndex()
+
 class MemoryPromptTemplate(StringPromptTemplate):
-    memory_key: str
+    """
+    A prompt template that injects only the history relevant to the goal.
+
+    Instead of the whole conversation, the prompt gets the `top_k` turns of
+    `history_index` that best match the goal plus the `recent_turns` latest ones, so its
+    size stays bounded however long the session gets. The goal is read from `goal`, or
+    from `input` when the template is driven by an AgentExecutor. The history injected
+    into the last prompt is kept in `last_memory`.
+    """
+    history_index: ConversationIndex
+    top_k: int = 3
+    recent_turns: int = 4
+    last_memory: str = ""
+
+    class Config:
+        arbitrary_types_allowed = True
 
     def format(self, **kwargs) -> str:
-        memory = kwargs.pop(self.memory_key)
-        kwargs["memory"] = memory
+        goal = kwargs.setdefault("goal", kwargs.get("input", ""))
+        kwargs["memory"] = self.last_memory = self.history_index.render(goal, self.top_k, self.recent_turns)
         return self.template.format(**kwargs)
 
 plan_prompt = MemoryPromptTemplate(
     input_variables=["goal", "memory"],
-    memory_key="chat_history",
+    history_index=history_index,
     template="""
 You are a helpful travel assistant.
 
@@ -93,7 +254,9 @@ Execution Result:
 """
 )
 
-travel_prompt = StringPromptTemplate(
+travel_prompt = MemoryPromptTemplate(  # The prompt the agent actually uses, so it gets the retrieved turns too
+    input_variables=["goal", "memory"],
+    history_index=history_index,
     template="""
 You are a helpful travel assistant. You have access to tools that can get distances between cities and weather information.
 
@@ -115,16 +278,15 @@ execution_chain = LLMChain(llm=OpenAI(temperature=0, openai_api_key=OPENAI_API_K
 
 custom_chain = SimpleSequentialChain(chains=[plan_chain, execution_chain], verbose=True)
 
-memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-
+agent_llm = OpenAI(temperature=0, openai_api_key=OPENAI_API_KEY)
 agent = create_react_agent(
-    llm=OpenAI(temperature=0, openai_api_key=OPENAI_API_KEY),
+    llm=agent_llm,
     prompt=travel_prompt,
     tools=tools,
-    memory=memory,
     verbose=True,
 )
-agent_executor = AgentExecutor(agent=agent, tools=tools, memory=memory, verbose=True)
+# No executor memory: the only history the agent sees is what travel_prompt retrieves from history_index
+agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, return_intermediate_steps=True)
 
 # --- Agent Execution Function ---
 
@@ -132,9 +294,12 @@ def run_agent(goal):
     print(f"\nGoal: {goal}")
     response = agent_executor.invoke({"input": goal})
     print(f"Agent's Response: {response['output']}")
-    print("\nMemory Content:")
-    for message in memory.buffer:
-        print(f"{message.type}: {message.content}")
+    history = travel_prompt.last_memory  # Exactly what the agent's prompt contained
+    print(f"\nHistory in the agent prompt ({agent_llm.get_num_tokens(history)} tokens, {len(history_index)} turns indexed):\n{history}")
+    history_index.add(f"Human: {goal}")
+    for action, observation in response.get("intermediate_steps", []):
+        history_index.add(f"Tool {action.tool}({action.tool_input}): {observation}")
+    history_index.add(f"AI: {response['output']}")
     print("-" * 20)
 
 # --- Run Agent with Goals ---
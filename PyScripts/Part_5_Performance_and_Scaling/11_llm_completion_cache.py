@@ -0,0 +1,260 @@
+# 11_llm_completion_cache.py
+# This script demonstrates caching LLM completions for the ReAct agents from Part 2.
+# With temperature=0 the prompt for a given (state, goal) is identical across cycles and runs,
+# so a warm cache turns a network round trip into a dictionary lookup.
+
+import hashlib
+import json
+import os
+import random
+import runpy
+import sqlite3
+import time
+from collections import OrderedDict
+from langchain.llms import OpenAI
+from dotenv import load_dotenv
+
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+
+class CompletionCache:
+    """
+    An in-memory LRU cache of completions backed by a SQLite store.
+
+    Entries are keyed by a hash of (model, temperature, prompt). The in-memory layer
+    evicts the least recently used entry once it holds `max_entries`, and both layers
+    drop entries older than `ttl_seconds`.
+
+    Attributes:
+        hits (int): Lookups answered from memory or disk.
+        disk_hits (int): The subset of hits that had to be loaded from SQLite.
+        misses (int): Lookups that found nothing (or only an expired entry).
+        evictions (int): Entries dropped from memory because of size or TTL.
+    """
+    def __init__(self, path="llm_cache.sqlite3", max_entries=1024, ttl_seconds=24 * 60 * 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()  # key -> (completion, created_at), oldest first
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.db = None
+        if path:  # path=None keeps the cache purely in memory
+            self.db = sqlite3.connect(path)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, completion TEXT, created_at REAL)"
+            )
+
+    @staticmethod
+    def make_key(model, temperature, prompt):
+        """Returns a stable hash of everything that determines the completion."""
+        payload = json.dumps([model, temperature, prompt])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _is_expired(self, created_at):
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key, completion, created_at):
+        self.entries[key] = (completion, created_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)  # Least recently used entry goes first
+            self.evictions += 1
+
+    def get(self, key):
+        """
+        Looks up a completion, first in memory and then on disk.
+
+        Args:
+            key (str): A key produced by `make_key`.
+
+        Returns:
+            str or None: The cached completion, or None on a miss.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            completion, created_at = entry
+            if not self._is_expired(created_at):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return completion
+            del self.entries[key]
+            self.evictions += 1
+
+        if self.db is not None:
+            row = self.db.execute(
+                "SELECT completion, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and not self._is_expired(row[1]):
+                self._remember(key, row[0], row[1])  # Promote to the in-memory layer
+                self.hits += 1
+                self.disk_hits += 1
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    def put(self, key, completion):
+        """Stores a completion in memory and, if configured, on disk."""
+        created_at = time.time()
+        self._remember(key, completion, created_at)
+        if self.db is not None:
+            self.db.execute(
+                "INSERT OR REPLACE INTO completions (key, completion, created_at) VALUES (?, ?, ?)",
+                (key, completion, created_at),
+            )
+            self.db.commit()
+
+    def stats(self):
+        """Returns the hit/miss/eviction counters as a dictionary."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedLLM:
+    """
+    Wraps any callable LLM (prompt -> completion, with an optional stream()) with a CompletionCache.
+
+    Only deterministic calls (temperature 0) are cached; anything else is passed
+    straight through, since sampling at a higher temperature is expected to vary.
+    The agents of Part 2 take their LLM as a parameter, so they can be given a
+    CachedLLM without any change.
+    """
+    def __init__(self, llm, cache):
+        self.llm = llm
+        self.cache = cache
+        self.model = getattr(llm, "model_name", type(llm).__name__)
+        self.temperature = getattr(llm, "temperature", 0)
+
+    def __call__(self, prompt):
+        if self.temperature != 0:
+            return self.llm(prompt)
+        key = self.cache.make_key(self.model, self.temperature, prompt)
+        completion = self.cache.get(key)
+        if completion is None:
+            completion = self.llm(prompt)
+            self.cache.put(key, completion)
+        return completion
+
+    def stream(self, prompt):
+        """Streams a completion; a cached one arrives as a single chunk."""
+        if self.temperature != 0:
+            yield from self.llm.stream(prompt)
+            return
+        key = self.cache.make_key(self.model, self.temperature, prompt)
+        completion = self.cache.get(key)
+        if completion is not None:
+            yield completion
+            return
+        chunks = []
+        for chunk in self.llm.stream(prompt):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.put(key, "".join(chunks))  # Only streams read to the end are cached
+
+
+class BasicEnvironment:
+    """
+    Represents a simple environment with different states.
+
+    Attributes:
+        current_state (str): The current state of the environment.
+    """
+    def __init__(self, initial_state):
+        self.current_state = initial_state
+
+    def get_state(self):
+        """Returns the current state of the environment."""
+        return self.current_state
+
+    def change_state(self, new_state):
+        """Changes the state of the environment."""
+        self.current_state = new_state
+
+class ReActAgent:
+    """The LLM-driven agent from 4_react_with_llm_basic.py, taking its LLM as a parameter."""
+    def __init__(self, environment, llm):
+        self.environment = environment
+        self.llm = llm
+
+    def observe(self):
+        return self.environment.get_state()
+
+    def think(self, observation):
+        prompt = f"""
+        You are an agent in a simple environment. Your goal is to keep the room clean.
+        The current state of the room is: {observation}
+
+        Based on this observation, what action should you take?
+
+        Action:
+        """
+        try:
+            llm_output = self.llm(prompt)
+            action = llm_output.strip()
+        except Exception as e:
+            print(f"Error during LLM call: {e}")
+            action = "unknown state"
+        return action
+
+    def act(self, action, debug=False):
+        if debug:
+            print(f"Raw LLM Output: {action}")
+
+        if "clean" in action.lower():
+            self.environment.change_state("clean")
+            return "You cleaned the room. It is now clean."
+        elif "dust" in action.lower():
+            self.environment.change_state("less messy")
+            return "You dusted the room. It is now less messy, but still needs cleaning."
+        elif "nothing" in action.lower() or "relax" in action.lower():
+            return "You did nothing."
+        elif "unknown" in action.lower():
+            return "I don't know what to do in this state."
+        else:
+            return f"I don't know how to do '{action}'."
+
+if __name__ == "__main__":
+    possible_states = ["messy", "clean", "dusty"]
+    cache = CompletionCache("llm_cache.sqlite3", max_entries=256, ttl_seconds=60 * 60)
+    llm = CachedLLM(OpenAI(temperature=0, openai_api_key=OPENAI_API_KEY), cache)
+
+    # Many rooms, few distinct states: after the first few cycles every think() is a cache hit.
+    num_rooms = 20
+    num_cycles = 3
+    for room in range(num_rooms):
+        room_environment = BasicEnvironment(random.choice(possible_states))
+        agent = ReActAgent(room_environment, llm)
+        for cycle in range(num_cycles):
+            observation = agent.observe()
+            start = time.perf_counter()
+            thought = agent.think(observation)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            action_result = agent.act(thought)
+            print(f"Room {room + 1}, Cycle {cycle + 1}: {observation} -> {thought} ({elapsed_ms:.2f} ms) -> {action_result}")
+
+    print("-" * 20)
+    print(f"Cache Stats: {cache.stats()}")
+
+    # The same cache, unchanged, behind the streaming plan-execution agent of Part 2
+    part_2 = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Part_2_LLM_Powered_ReAct_Agents")
+    plan_execution = runpy.run_path(os.path.join(part_2, "7_react_with_llm_plan_execution.py"), run_name="imported")
+    for room in range(3):
+        room_environment = plan_execution["BasicEnvironment"]("messy")
+        agent = plan_execution["ReActPlanExecutingAgent"](room_environment, OPENAI_API_KEY, llm)
+        start = time.perf_counter()
+        plan = list(agent.think_stream(room_environment.get_state(), "Make the room clean."))  # Read to the end, so it is cached
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"Planning agent, room {room + 1}: {plan} ({elapsed_ms:.2f} ms)")
+
+    print("-" * 20)
+    print(f"Cache Stats: {cache.stats()}")
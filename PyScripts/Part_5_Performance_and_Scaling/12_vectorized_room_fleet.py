@@ -0,0 +1,187 @@
+# 12_vectorized_room_fleet.py
+# This script demonstrates stepping a whole fleet of rooms at once with NumPy.
+# The rules are the same as in 3_rule_based_react.py, but states and actions are
+# integer codes, so one ReAct cycle over millions of rooms is two array lookups.
+
+import random
+import time
+import numpy as np
+
+# State codes (index into STATE_NAMES)
+MESSY, DUSTY, LESS_MESSY, CLEAN = 0, 1, 2, 3
+STATE_NAMES = ["messy", "dusty", "less messy", "clean"]
+
+# Action codes (index into ACTION_NAMES)
+CLEAN_ROOM, DUST_ROOM, DO_NOTHING = 0, 1, 2
+ACTION_NAMES = ["clean the room", "dust the room", "do nothing"]
+
+# think(): state code -> action code
+THINK_TABLE = np.array([CLEAN_ROOM, DUST_ROOM, CLEAN_ROOM, DO_NOTHING], dtype=np.uint8)
+
+# act(): (action code, state code) -> next state code
+ACT_TABLE = np.array([
+    [CLEAN, CLEAN, CLEAN, CLEAN],                      # clean the room
+    [LESS_MESSY, LESS_MESSY, LESS_MESSY, LESS_MESSY],  # dust the room
+    [MESSY, DUSTY, LESS_MESSY, CLEAN],                 # do nothing
+], dtype=np.uint8)
+
+
+class RoomFleetEnvironment:
+    """
+    Represents many rooms at once as an integer-coded state array.
+
+    Attributes:
+        states (np.ndarray): One uint8 state code per room.
+    """
+    def __init__(self, initial_states):
+        self.states = np.asarray(initial_states, dtype=np.uint8)
+
+    @classmethod
+    def random(cls, num_rooms, seed=None):
+        """Creates a fleet with every room in a random state."""
+        rng = np.random.default_rng(seed)
+        return cls(rng.integers(0, len(STATE_NAMES), size=num_rooms, dtype=np.uint8))
+
+    def get_state(self, room):
+        """Returns the state name of a single room."""
+        return STATE_NAMES[self.states[room]]
+
+    def state_counts(self):
+        """Returns how many rooms are in each state."""
+        counts = np.bincount(self.states, minlength=len(STATE_NAMES))
+        return dict(zip(STATE_NAMES, counts.tolist()))
+
+    def is_goal_state(self):
+        """Checks if every room is clean."""
+        return bool((self.states == CLEAN).all())
+
+class FleetReActAgent:
+    """
+    Applies the rule-based think/act cycle from 3_rule_based_react.py to every room in a fleet.
+
+    Attributes:
+        environment (RoomFleetEnvironment): The fleet being cleaned.
+    """
+    def __init__(self, environment):
+        self.environment = environment
+
+    def observe(self):
+        """Observes the state codes of all rooms."""
+        return self.environment.states
+
+    def think(self, observation):
+        """Returns the action code for every room."""
+        return THINK_TABLE[observation]
+
+    def act(self, actions):
+        """Applies the action codes to every room and updates the fleet in place."""
+        self.environment.states = ACT_TABLE[actions, self.environment.states]
+        return self.environment.states
+
+    def step(self):
+        """Runs one full ReAct cycle over the fleet."""
+        return self.act(self.think(self.observe()))
+
+
+# --- Scalar baseline (the classes from 3_rule_based_react.py, without printing) ---
+
+class BasicEnvironment:
+    def __init__(self, initial_state):
+        self.current_state = initial_state
+
+    def get_state(self):
+        return self.current_state
+
+    def change_state(self, new_state):
+        self.current_state = new_state
+
+class ReActAgent:
+    def __init__(self, environment):
+        self.environment = environment
+
+    def observe(self):
+        return self.environment.get_state()
+
+    def think(self, observation):
+        if observation == "messy":
+            return "clean the room"
+        elif observation == "dusty":
+            return "dust the room"
+        elif observation == "less messy":
+            return "clean the room"
+        elif observation == "clean":
+            return "do nothing"
+        else:
+            return "unknown state"
+
+    def act(self, action):
+        if action == "clean the room":
+            self.environment.change_state("clean")
+            return "You cleaned the room. It is now clean."
+        elif action == "dust the room":
+            self.environment.change_state("less messy")
+            return "You dusted the room. It is now less messy, but still needs cleaning."
+        elif action == "do nothing":
+            return "You did nothing."
+        elif action == "unknown state":
+            return "I don't know what to do in this state."
+        else:
+            return "I don't know how to do that."
+
+
+def benchmark(num_rooms=1_000_000, num_cycles=3, scalar_rooms=100_000):
+    """
+    Compares rooms-stepped-per-second of the vectorized fleet against the scalar loop.
+
+    The scalar loop is run on a smaller sample (`scalar_rooms`) to keep the benchmark short.
+
+    Returns:
+        dict: Rooms stepped per second for both implementations and the speedup.
+    """
+    initial_codes = np.random.default_rng(0).integers(0, len(STATE_NAMES), size=num_rooms, dtype=np.uint8)
+
+    agents = [ReActAgent(BasicEnvironment(STATE_NAMES[code])) for code in initial_codes[:scalar_rooms]]
+    start = time.perf_counter()
+    for _ in range(num_cycles):
+        for agent in agents:
+            agent.act(agent.think(agent.observe()))
+    scalar_rate = scalar_rooms * num_cycles / (time.perf_counter() - start)
+
+    fleet_agent = FleetReActAgent(RoomFleetEnvironment(initial_codes))
+    start = time.perf_counter()
+    for _ in range(num_cycles):
+        fleet_agent.step()
+    vectorized_rate = num_rooms * num_cycles / (time.perf_counter() - start)
+
+    # Both implementations must agree on the final state of the sampled rooms.
+    scalar_final = [STATE_NAMES.index(agent.observe()) for agent in agents]
+    assert scalar_final == fleet_agent.observe()[:scalar_rooms].tolist()
+
+    return {
+        "scalar_rooms_per_second": scalar_rate,
+        "vectorized_rooms_per_second": vectorized_rate,
+        "speedup": vectorized_rate / scalar_rate,
+    }
+
+if __name__ == "__main__":
+    fleet = RoomFleetEnvironment.random(10, seed=random.randrange(1000))
+    agent = FleetReActAgent(fleet)
+
+    num_cycles = 3
+    for cycle in range(num_cycles):
+        print(f"--- Fleet ReAct Cycle {cycle + 1} ---")
+        print(f"Observation: {fleet.state_counts()}")
+        actions = agent.think(agent.observe())
+        print(f"Thought (room 1): {ACTION_NAMES[actions[0]]}")
+        agent.act(actions)
+        print(f"Cycle Complete: {fleet.state_counts()}")
+        if fleet.is_goal_state():
+            print("Every room is clean!")
+            break
+        print("-" * 20)
+
+    print("\n--- Benchmark ---")
+    results = benchmark()
+    print(f"Scalar loop: {results['scalar_rooms_per_second']:,.0f} rooms stepped per second")
+    print(f"Vectorized fleet: {results['vectorized_rooms_per_second']:,.0f} rooms stepped per second")
+    print(f"Speedup: {results['speedup']:.0f}x")
@@ -0,0 +1,184 @@
+# 13_async_memory_agents.py
+# This script demonstrates driving many memory-based ReAct agents concurrently with asyncio.
+# While one agent waits on the LLM, the others keep working, so throughput scales with
+# the number of in-flight LLM calls instead of with the number of threads.
+
+import asyncio
+import random
+import time
+
+VALID_ACTIONS = ["clean the room", "dust the room", "do nothing", "unknown state"]
+
+
+class FakeAsyncLLM:
+    """
+    A local stand-in for an async LLM client, with a configurable latency.
+
+    It answers with the action 3_rule_based_react.py would take in the state named in
+    the prompt. Any client exposing `async ainvoke(prompt)` (such as the langchain
+    OpenAI LLM) can be used instead.
+
+    Attributes:
+        latency (float): Seconds each call takes.
+        calls (int): Number of calls served.
+    """
+    RULES = {
+        "messy": "clean the room",
+        "dusty": "dust the room",
+        "less messy": "clean the room",
+        "clean": "do nothing",
+    }
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.latency)  # Simulated network round trip
+        self.calls += 1
+        state = prompt.split("The current state of the room is:")[1].split("\n")[0].strip()
+        return self.RULES.get(state, "unknown state")
+
+
+class BasicEnvironment:
+    """
+    Represents a simple environment with different states and a goal state.
+
+    Attributes:
+        current_state (str): The current state of the environment.
+        goal_state (str): The desired state of the environment.
+    """
+    def __init__(self, initial_state, goal_state="clean"):
+        self.current_state = initial_state
+        self.goal_state = goal_state
+
+    def get_state(self):
+        """Returns the current state of the environment."""
+        return self.current_state
+
+    def change_state(self, new_state):
+        """Changes the state of the environment."""
+        self.current_state = new_state
+
+    def is_goal_state(self):
+        """Checks if the current state matches the goal state."""
+        return self.current_state == self.goal_state
+
+class AsyncReActMemoryAgent:
+    """
+    The ReActMemoryAgent from 5_react_with_llm_memory.py with async think/act.
+
+    Agents share one LLM client and one semaphore that caps the number of in-flight
+    LLM calls; each agent keeps its own environment and memory.
+
+    Attributes:
+        environment (BasicEnvironment): The agent's own environment.
+        llm: An LLM client exposing `async ainvoke(prompt)`.
+        llm_slots (asyncio.Semaphore): Limits concurrent LLM calls across agents.
+        memory (list): The last five observation/action/outcome entries.
+    """
+    def __init__(self, environment, llm, llm_slots):
+        self.environment = environment
+        self.llm = llm
+        self.llm_slots = llm_slots
+        self.memory = []
+
+    def observe(self):
+        return self.environment.get_state()
+
+    async def think(self, observation, goal):
+        """Asks the LLM for the best single action, waiting for a free LLM slot first."""
+        memory_string = "\n".join(self.memory) if self.memory else "No memory available."
+        prompt = f"""
+        You are an agent in a simple environment. Your current goal is: {goal}
+        The current state of the room is: {observation}
+        Here is your memory of past observations, actions, and outcomes:
+        {memory_string}
+
+        Based on your memory and the current state, what is the BEST single action to take NOW to achieve your goal?
+
+        Action:
+        """
+        try:
+            async with self.llm_slots:
+                llm_output = await self.llm.ainvoke(prompt)
+            return llm_output.strip()
+        except Exception as e:
+            print(f"Error during LLM call: {e}")
+            return "unknown state"
+
+    async def act(self, action):
+        if "clean" in action.lower():
+            self.environment.change_state("clean")
+            action_result = "You cleaned the room. It is now clean."
+        elif "dust" in action.lower():
+            self.environment.change_state("less messy")
+            action_result = "You dusted the room. It is now less messy, but still needs cleaning."
+        elif "nothing" in action.lower() or "relax" in action.lower():
+            action_result = "You did nothing."
+        elif "unknown" in action.lower():
+            action_result = "I don't know what to do in this state."
+        else:
+            action_result = f"I don't know how to do '{action}'."
+        self.memory.append(f"Observation: {self.environment.get_state()}, Action: {action}, Outcome: {action_result}")
+        self.memory = self.memory[-5:]
+        return action_result
+
+async def run_cycles(agent, goal, num_cycles=5):
+    """
+    Runs the observe/think/act cycle for one agent until its goal is reached.
+
+    Returns:
+        int: The number of cycles the agent ran.
+    """
+    for cycle in range(num_cycles):
+        observation = agent.observe()
+        thought = await agent.think(observation, goal)
+        if thought not in VALID_ACTIONS:
+            thought = "unknown state"
+        if thought != "unknown state":
+            await agent.act(thought)
+        if agent.environment.is_goal_state():
+            return cycle + 1
+    return num_cycles
+
+async def run_agents(num_agents, llm, max_concurrent_llm_calls, goal="Make the room clean.", num_cycles=5):
+    """
+    Runs `num_agents` independent agents concurrently.
+
+    Args:
+        num_agents (int): How many agents (each with its own room) to run.
+        llm: The shared LLM client.
+        max_concurrent_llm_calls (int): Upper bound on in-flight LLM calls.
+
+    Returns:
+        list: The agents, after their episodes have finished.
+    """
+    llm_slots = asyncio.Semaphore(max_concurrent_llm_calls)
+    possible_states = ["messy", "clean", "dusty", "less messy"]
+    agents = [
+        AsyncReActMemoryAgent(BasicEnvironment(random.choice(possible_states)), llm, llm_slots)
+        for _ in range(num_agents)
+    ]
+    await asyncio.gather(*(run_cycles(agent, goal, num_cycles) for agent in agents))
+    return agents
+
+if __name__ == "__main__":
+    num_agents = 1000
+    latency = 0.05
+
+    print(f"Running {num_agents} agents against a fake LLM with {latency * 1000:.0f} ms latency")
+    for max_concurrent_llm_calls in [1, 10, 100, 1000]:
+        if max_concurrent_llm_calls == 1:
+            num_agents_run = 20  # Fully serial is slow; a small sample is enough to show the rate
+        else:
+            num_agents_run = num_agents
+        llm = FakeAsyncLLM(latency)
+        start = time.perf_counter()
+        agents = asyncio.run(run_agents(num_agents_run, llm, max_concurrent_llm_calls))
+        elapsed = time.perf_counter() - start
+        solved = sum(agent.environment.is_goal_state() for agent in agents)
+        print(
+            f"Concurrency {max_concurrent_llm_calls:>4}: {llm.calls / elapsed:8.1f} LLM calls/s, "
+            f"{num_agents_run} agents in {elapsed:.2f}s, {solved} rooms clean"
+        )
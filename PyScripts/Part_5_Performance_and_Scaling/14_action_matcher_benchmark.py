@@ -0,0 +1,178 @@
+# 14_action_matcher_benchmark.py
+# This script benchmarks the compiled ActionMatcher used by act() and plan filtering in
+# scripts 4-8 against the original code, which lowercases the LLM output and runs one
+# substring test per action.
+
+import random
+import re
+import time
+
+class ActionMatcher:
+    """
+    Maps free-text LLM output to an action id in a single pass.
+
+    Every keyword (actions and synonyms such as "relax") is compiled once into a
+    trie-shaped regular expression, so scanning the text costs about the same no
+    matter how many actions are in the vocabulary. When several keywords occur,
+    the action listed first in the vocabulary wins, like the original if/elif chain
+    (keywords that overlap in the text resolve to the longest one).
+
+    Attributes:
+        keywords (dict): Keyword -> (priority, action id).
+    """
+    def __init__(self, vocabulary):
+        """
+        Args:
+            vocabulary (list): (action id, [keywords]) pairs in priority order.
+        """
+        self.keywords = {}
+        for priority, (action_id, keywords) in enumerate(vocabulary):
+            for keyword in keywords:
+                self.keywords.setdefault(keyword.lower(), (priority, action_id))
+        trie = {}
+        for keyword in self.keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}  # Marks the end of a keyword
+        self.pattern = re.compile(self._trie_to_regex(trie))
+
+    def _trie_to_regex(self, node):
+        branches = [re.escape(char) + self._trie_to_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        regex = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{regex})?" if "" in node else regex
+
+    def match(self, text):
+        """Returns the id of the highest-priority action mentioned in `text`, or None."""
+        best = None
+        for found in self.pattern.finditer(text.lower()):
+            candidate = self.keywords[found.group()]
+            if best is None or candidate < best:
+                best = candidate
+                if best[0] == 0:
+                    break  # Nothing can outrank the first action
+        return best[1] if best else None
+
+ACTION_MATCHER = ActionMatcher([
+    ("clean the room", ["clean"]),
+    ("dust the room", ["dust"]),
+    ("do nothing", ["nothing", "relax"]),
+    ("unknown state", ["unknown"]),
+])
+
+# The plan filters of scripts 6-8 match whole action phrases, not single keywords
+PLAN_STEP_MATCHER = ActionMatcher([(action_id, [action_id]) for action_id in ("clean the room", "dust the room", "do nothing", "unknown state")])
+
+# Plan lines as the agents' LLM writes them, including lines that only mention a keyword
+AGENT_PLAN_LINES = [
+    "1. Clean the room.",
+    "2. Dust the room",
+    "- Do nothing",
+    "Step 3: clean the room, then dust the room",
+    "Plan:",
+    "Plan: relax",
+    "1. Check whether the room is clean",
+    "The room is unclean",
+    "Vacuum the dust bunnies",
+    "Nothing else is needed.",
+    "The state is unknown state",
+    "Wait and observe the room again.",
+]
+NOT_ACTIONS = ["Plan: relax", "1. Check whether the room is clean", "The room is unclean", "Vacuum the dust bunnies"]
+
+def check_agent_plan_lines(valid_actions=("clean the room", "dust the room", "do nothing")):
+    """Checks that the compiled plan filter keeps exactly the agents' plan lines the original filter kept."""
+    substring_plan = substring_plan_filter(AGENT_PLAN_LINES, valid_actions)
+    matcher_plan = matcher_plan_filter(AGENT_PLAN_LINES, PLAN_STEP_MATCHER, valid_actions)
+    assert substring_plan == matcher_plan, (substring_plan, matcher_plan)
+    assert not set(matcher_plan) & set(NOT_ACTIONS)
+    return matcher_plan
+
+def substring_match(text, vocabulary):
+    """The original approach: one lowercase copy and one substring test per keyword, in priority order."""
+    for action_id, keywords in vocabulary:
+        for keyword in keywords:
+            if keyword in text.lower():
+                return action_id
+    return None
+
+def substring_plan_filter(plan, valid_actions):
+    """The original plan filter from the main loops of scripts 6-8."""
+    return [step for step in plan if any(valid_action in step.lower() for valid_action in valid_actions)]
+
+def matcher_plan_filter(plan, matcher, valid_actions):
+    """The plan filter using the compiled matcher."""
+    return [step for step in plan if matcher.match(step) in valid_actions]
+
+def make_vocabulary(num_actions):
+    """Builds a synthetic vocabulary of `num_actions` distinct "<verb> the <object>" actions."""
+    verbs = ["clean", "dust", "mop", "vacuum", "polish", "wipe", "scrub", "tidy", "wash", "sweep"]
+    objects = [f"{thing} {number}" for thing in ["window", "shelf", "desk", "floor", "door", "lamp"] for number in range(100, 200)]
+    actions = [f"{verb} the {obj}" for obj in objects for verb in verbs][:num_actions]
+    return [(action, [action]) for action in actions]
+
+def make_outputs(vocabulary, num_outputs, seed=0):
+    """Builds verbose, LLM-style plan steps that mention one action near the end (or none at all)."""
+    rng = random.Random(seed)
+    preamble = (
+        "Considering the current state of the room and everything I remember about previous "
+        "observations, actions and outcomes, I believe the best course of action right now is to "
+    )
+    outputs = []
+    for i in range(num_outputs):
+        if rng.random() < 0.2:
+            outputs.append(f"{i + 1}. {preamble}wait and observe the room again.")
+        else:
+            action = rng.choice(vocabulary)[0]
+            outputs.append(f"{i + 1}. {preamble}{action.capitalize()}, then report back.")
+    return outputs
+
+def benchmark(num_actions, num_outputs=2000):
+    """
+    Times both approaches on the same outputs and checks that they agree.
+
+    Returns:
+        dict: Steps matched per second for the substring scan and the compiled matcher.
+    """
+    vocabulary = make_vocabulary(num_actions)
+    outputs = make_outputs(vocabulary, num_outputs)
+    valid_actions = {action_id for action_id, _ in vocabulary}
+
+    start = time.perf_counter()
+    substring_ids = [substring_match(output, vocabulary) for output in outputs]
+    substring_plan = substring_plan_filter(outputs, valid_actions)
+    substring_rate = 2 * num_outputs / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    matcher = ActionMatcher(vocabulary)
+    compile_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    matcher_ids = [matcher.match(output) for output in outputs]
+    matcher_plan = matcher_plan_filter(outputs, matcher, valid_actions)
+    matcher_rate = 2 * num_outputs / (time.perf_counter() - start)
+
+    assert substring_ids == matcher_ids
+    assert substring_plan == matcher_plan
+
+    return {
+        "substring_steps_per_second": substring_rate,
+        "matcher_steps_per_second": matcher_rate,
+        "compile_ms": compile_seconds * 1000,
+    }
+
+if __name__ == "__main__":
+    for text in ["1. Clean the room.", "Dust the room, then clean it", "I would just relax.", "Open the window"]:
+        print(f"'{text}' -> {ACTION_MATCHER.match(text)}")
+
+    print(f"\nPlan lines kept by the plan filter: {check_agent_plan_lines()}")
+
+    print("\n--- Benchmark ---")
+    for num_actions in [4, 50, 300, 1000]:
+        results = benchmark(num_actions)
+        print(
+            f"{num_actions:>5} actions: substring scan {results['substring_steps_per_second']:>10,.0f} steps/s, "
+            f"compiled matcher {results['matcher_steps_per_second']:>10,.0f} steps/s "
+            f"(compiled once in {results['compile_ms']:.1f} ms)"
+        )
@@ -0,0 +1,171 @@
+# 15_pooled_weather_client.py
+# This script demonstrates the WeatherClient used by get_weather in 10_2_react_with_langchain_advanced.py
+# against a local stub of the OpenWeatherMap API that counts requests and injects latency,
+# so pooling, timeouts, caching and request coalescing can be checked without network access.
+
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class WeatherClient:
+    """
+    An OpenWeatherMap client with a pooled keep-alive session, timeouts, a short-TTL cache
+    and single-flight coalescing of concurrent identical lookups.
+
+    Attributes:
+        requests_sent (int): Number of HTTP requests actually made.
+        cache_hits (int): Lookups answered from the cache.
+        coalesced (int): Lookups that waited for an identical in-flight request instead of sending their own.
+    """
+    def __init__(self, api_key, base_url="http://api.openweathermap.org/data/2.5/weather",
+                 connect_timeout=3.05, read_timeout=10, ttl_seconds=5 * 60, pool_size=10):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.ttl_seconds = ttl_seconds
+        self.session = requests.Session()  # Reuses keep-alive connections between calls
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cache = {}  # normalized location -> (result, fetched_at)
+        self.in_flight = {}  # normalized location -> Future shared by concurrent callers
+        self.lock = threading.Lock()
+        self.requests_sent = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def normalize(location):
+        """Lowercases the location and collapses whitespace."""
+        return " ".join(location.lower().split())
+
+    def get_weather(self, location):
+        """Returns a weather description for the location, from the cache, an in-flight request or the API."""
+        key = self.normalize(location)
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached is not None and time.time() - cached[1] <= self.ttl_seconds:
+                self.cache_hits += 1
+                return cached[0]
+            future = self.in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self.in_flight[key] = future
+            else:
+                self.coalesced += 1
+        if not is_leader:
+            return future.result()  # Wait for the identical request that is already running
+
+        try:
+            result, cacheable = self._fetch(location)
+            if cacheable:
+                with self.lock:
+                    self.cache[key] = (result, time.time())
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def _fetch(self, location):
+        """Calls the API once; returns (message, whether the message is worth caching)."""
+        with self.lock:
+            self.requests_sent += 1
+        params = {"q": location, "appid": self.api_key, "units": "metric"}
+        try:
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            if "main" not in data: # More robust API response checking
+                return f"Weather information not found for {location} (Invalid API Response).", False
+            temp = data["main"]["temp"]
+            description = data["weather"][0]["description"]
+            return f"The weather in {location} is {description} with a temperature of {temp:.1f}°C.", True
+        except requests.exceptions.Timeout:
+            return f"Error: Timed out retrieving weather data for {location}.", False
+        except requests.exceptions.RequestException as e:
+            if e.response is not None and e.response.status_code == 401:
+                return "Error: Invalid OpenWeatherMap API key.", False # Explicit API key error handling
+            return f"Error: Could not retrieve weather data: {e}", False
+        except (KeyError, IndexError, ValueError):
+            return "Error: Invalid weather data received.", False
+
+class StubWeatherServer:
+    """
+    A local HTTP server that answers like the OpenWeatherMap current-weather endpoint.
+
+    Attributes:
+        latency (float): Seconds to wait before answering each request.
+        request_count (int): Number of requests received.
+        url (str): The endpoint URL to pass to WeatherClient as base_url.
+    """
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.request_count = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, so the client's connection pool is exercised
+
+            def do_GET(self):
+                stub.request_count += 1
+                time.sleep(stub.latency)
+                city = parse_qs(urlparse(self.path).query).get("q", ["?"])[0]
+                body = json.dumps({"name": city, "main": {"temp": 21.5}, "weather": [{"description": "clear sky"}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep the demo output readable
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/data/2.5/weather"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+if __name__ == "__main__":
+    with StubWeatherServer(latency=0.2) as stub:
+        client = WeatherClient("stub-key", base_url=stub.url, ttl_seconds=60)
+
+        print("--- 20 concurrent lookups for the same city ---")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            results = list(pool.map(client.get_weather, ["Paris", "paris", " PARIS "] * 6 + ["Paris", "Paris"]))
+        print(f"Result: {results[0]}")
+        print(f"Took {time.perf_counter() - start:.2f}s, HTTP requests: {stub.request_count}, coalesced: {client.coalesced}")
+
+        print("\n--- Repeat lookup within the TTL ---")
+        start = time.perf_counter()
+        client.get_weather("Paris")
+        print(f"Took {(time.perf_counter() - start) * 1000:.2f} ms, HTTP requests: {stub.request_count}, cache hits: {client.cache_hits}")
+
+        print("\n--- Different cities in parallel ---")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(client.get_weather, ["London", "Rome", "Madrid"]))
+        print(f"Took {time.perf_counter() - start:.2f}s, HTTP requests: {stub.request_count}")
+
+        print("\n--- Slow API with a short read timeout ---")
+        stub.latency = 1.0
+        impatient_client = WeatherClient("stub-key", base_url=stub.url, read_timeout=0.3)
+        start = time.perf_counter()
+        print(f"{impatient_client.get_weather('Berlin')} ({time.perf_counter() - start:.2f}s)")
@@ -0,0 +1,218 @@
+# 16_llm_cassettes.py
+# This script demonstrates recording and replaying LLM calls ("cassettes"), so any agent
+# script from 4 to 10 can run offline and deterministically, for example on CI machines.
+#
+# Record once (needs OPENAI_API_KEY):
+#     python 16_llm_cassettes.py record cassettes/plan.jsonl.gz ../Part_2_LLM_Powered_ReAct_Agents/7_react_with_llm_plan_execution.py
+# Replay as often as needed (no network; optionally with the recorded latency):
+#     python 16_llm_cassettes.py replay cassettes/plan.jsonl.gz ../Part_2_LLM_Powered_ReAct_Agents/7_react_with_llm_plan_execution.py --latency none
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import runpy
+import sys
+import time
+import types
+
+
+class Cassette:
+    """
+    A compact store of prompt -> completion pairs with the time each call took.
+
+    Entries are keyed by a hash of the prompt (and stop sequences) and saved as JSON lines,
+    gzip-compressed when the path ends in ".gz". A prompt asked several times replays its
+    recorded completions in order, repeating the last one once they run out.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}  # key -> list of (completion, latency)
+        self.positions = {}  # key -> index of the next entry to replay
+
+    @staticmethod
+    def make_key(prompt, stop=None):
+        return hashlib.sha256(json.dumps([prompt, stop]).encode("utf-8")).hexdigest()[:32]
+
+    def _open(self, mode):
+        return gzip.open(self.path, mode + "t", encoding="utf-8") if self.path.endswith(".gz") else open(self.path, mode, encoding="utf-8")
+
+    def load(self):
+        with self._open("r") as cassette_file:
+            for line in cassette_file:
+                entry = json.loads(line)
+                self.entries.setdefault(entry["key"], []).append((entry["completion"], entry["latency"]))
+        return self
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._open("w") as cassette_file:
+            for key, recordings in self.entries.items():
+                for completion, latency in recordings:
+                    cassette_file.write(json.dumps({"key": key, "completion": completion, "latency": round(latency, 4)}) + "\n")
+
+    def record(self, prompt, stop, completion, latency):
+        self.entries.setdefault(self.make_key(prompt, stop), []).append((completion, latency))
+
+    def play(self, prompt, stop=None):
+        """Returns the next recorded (completion, latency) for the prompt."""
+        key = self.make_key(prompt, stop)
+        recordings = self.entries.get(key)
+        if not recordings:
+            raise KeyError(f"Prompt not found in cassette {self.path}: {prompt.strip()[:80]!r}")
+        position = self.positions.get(key, 0)
+        self.positions[key] = position + 1
+        return recordings[min(position, len(recordings) - 1)]
+
+    def __len__(self):
+        return sum(len(recordings) for recordings in self.entries.values())
+
+class CassetteLLM:
+    """
+    An LLM backend that records calls to a real LLM, or replays them from a cassette.
+
+    Attributes:
+        cassette (Cassette): Where calls are recorded to or replayed from.
+        llm: The real LLM in record mode; None in replay mode.
+        latency: In replay mode, "recorded" to sleep for the recorded time, "none" for no delay,
+            or a number of seconds to use as a synthetic latency for every call.
+        calls (int): Number of calls served.
+        llm_seconds (float): Total recorded (or real, when recording) LLM time of the calls served.
+    """
+    def __init__(self, cassette, llm=None, latency="recorded"):
+        self.cassette = cassette
+        self.llm = llm
+        self.latency = latency
+        self.calls = 0
+        self.llm_seconds = 0.0
+
+    def _replay_delay(self, recorded_latency):
+        if self.latency == "recorded":
+            return recorded_latency
+        if self.latency == "none":
+            return 0.0
+        return float(self.latency)
+
+    def __call__(self, prompt, stop=None):
+        if self.llm is not None:
+            start = time.perf_counter()
+            completion = self.llm.invoke(prompt, stop=stop) if hasattr(self.llm, "invoke") else self.llm(prompt)
+            latency = time.perf_counter() - start
+            self.cassette.record(prompt, stop, completion, latency)
+        else:
+            completion, latency = self.cassette.play(prompt, stop)
+            time.sleep(self._replay_delay(latency))
+        self.calls += 1
+        self.llm_seconds += latency
+        return completion
+
+    def invoke(self, prompt, config=None, stop=None, **kwargs):
+        return self(prompt, stop)
+
+    def stream(self, prompt, stop=None):
+        """Yields the completion token by token, spreading the latency over the tokens when replaying."""
+        if self.llm is not None:
+            yield self(prompt, stop)  # Recorded as a whole; replay re-chunks it
+            return
+        completion, latency = self.cassette.play(prompt, stop)
+        self.calls += 1
+        self.llm_seconds += latency
+        tokens = re.findall(r"\S+\s*", completion) or [completion]
+        for token in tokens:
+            time.sleep(self._replay_delay(latency) / len(tokens))
+            yield token
+
+def as_langchain_llm(backend):
+    """Wraps a CassetteLLM as a langchain LLM, so chains and agents (scripts 10_1 and 10_2) can use it too."""
+    from langchain_core.language_models.llms import LLM
+
+    class LangChainCassetteLLM(LLM):
+        backend: object
+
+        @property
+        def _llm_type(self):
+            return "cassette"
+
+        def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+            return self.backend(prompt, stop)
+
+        def __call__(self, prompt, stop=None, **kwargs):  # The agent scripts call self.llm(prompt) directly
+            return self.backend(prompt, stop)
+
+        def stream(self, prompt, config=None, stop=None, **kwargs):
+            return self.backend.stream(prompt, stop)
+
+    return LangChainCassetteLLM(backend=backend)
+
+def run_script(script_path, cassette_path, mode, latency="recorded", seed=0, script_args=()):
+    """
+    Runs an agent script with every OpenAI(...) it creates replaced by a cassette-backed LLM.
+
+    The random module is seeded so the script starts from the same states on every run,
+    which keeps its prompts (and therefore the cassette keys) identical. The script sees
+    only `script_args` on its command line.
+
+    Returns:
+        list: The CassetteLLM backends the script created.
+    """
+    cassette = Cassette(cassette_path) if mode == "record" else Cassette(cassette_path).load()
+    backends = []
+
+    real_openai = None
+    if mode == "record":
+        from langchain_community.llms import OpenAI as real_openai
+
+    def openai_factory(*args, **kwargs):
+        backend = CassetteLLM(cassette, real_openai(*args, **kwargs) if real_openai else None, latency)
+        backends.append(backend)
+        try:
+            return as_langchain_llm(backend)
+        except ImportError:
+            return backend  # Without langchain installed, scripts 4-9 still replay with the plain backend
+
+    for module_name in ["langchain.llms", "langchain_community.llms"]:
+        try:
+            module = __import__(module_name, fromlist=["OpenAI"])
+        except ImportError:
+            module = types.ModuleType(module_name)  # Replay needs no langchain for scripts 4-9
+            sys.modules[module_name] = module
+        module.OpenAI = openai_factory
+
+    if mode == "replay":
+        os.environ.setdefault("OPENAI_API_KEY", "replay")  # Scripts fall back to fakes without a key
+
+    random.seed(seed)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script_path)))
+    saved_argv = sys.argv
+    sys.argv = [script_path, *script_args]
+    try:
+        runpy.run_path(script_path, run_name="__main__")
+    finally:
+        sys.argv = saved_argv
+        if mode == "record":
+            cassette.save()
+    return backends
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or replay the LLM calls of an agent script.")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("cassette", help="Cassette file (.jsonl, or .jsonl.gz for compression)")
+    parser.add_argument("script", help="Agent script to run, e.g. 4_react_with_llm_basic.py")
+    parser.add_argument("--latency", default="recorded", help="Replay latency: recorded, none, or seconds per call")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the script's random initial states")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER, help="Arguments passed on to the agent script")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    backends = run_script(args.script, args.cassette, args.mode, args.latency, args.seed, args.script_args)
+    elapsed = time.perf_counter() - start
+
+    calls = sum(backend.calls for backend in backends)
+    llm_seconds = sum(backend.llm_seconds for backend in backends)
+    print("-" * 20)
+    print(f"{args.mode.capitalize()}ed {calls} LLM calls ({llm_seconds:.2f}s of recorded LLM time) in {elapsed:.2f}s wall clock")
@@ -0,0 +1,276 @@
+# 17_agent_metrics.py
+# This script demonstrates opt-in latency metrics for the observe/think/act phases of a ReAct agent.
+# instrument() works with any agent class in the cookbook (HelloReActAgent, ReActAgent,
+# ReActMemoryAgent, the planning agents and ReActAgentWithTools): it wraps the methods of one
+# agent instance, so agents that are not instrumented pay nothing.
+
+import bisect
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Histogram:
+    """A Prometheus-style histogram with cumulative buckets (in seconds)."""
+    BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(self.BUCKETS) + 1)  # The last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(self.BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_buckets(self):
+        """Returns (upper bound, cumulative count) pairs, ending with +Inf."""
+        bounds = [str(bound) for bound in self.BUCKETS] + ["+Inf"]
+        totals = []
+        running = 0
+        for bucket_count in self.bucket_counts:
+            running += bucket_count
+            totals.append(running)
+        return list(zip(bounds, totals))
+
+class AgentMetrics:
+    """
+    An in-process registry of latency histograms and counters for agent phases.
+
+    Histograms:
+        react_phase_duration_seconds{phase}: observe, think, think_prompt_build,
+            think_llm_wait, think_parse, act (and act_plan for the tools agent).
+        react_tool_duration_seconds{tool}: time spent in each tool call.
+    Counters:
+        react_llm_calls_total, react_tool_calls_total{tool}, react_errors_total{phase}.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # (metric name, label name, label value) -> Histogram
+        self.counters = {}  # (metric name, label name, label value) -> int
+
+    def observe(self, metric, label, value, seconds):
+        with self.lock:
+            key = (metric, label, value)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    def increment(self, metric, label=None, value=None, amount=1):
+        with self.lock:
+            key = (metric, label, value)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    @contextmanager
+    def timed(self, phase):
+        """Times a block as one observation of react_phase_duration_seconds{phase=...}."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.increment("react_errors_total", "phase", phase)
+            raise
+        finally:
+            self.observe("react_phase_duration_seconds", "phase", phase, time.perf_counter() - start)
+
+    def snapshot(self):
+        """
+        Returns the current values as plain dictionaries.
+
+        Returns:
+            dict: {"histograms": {metric: {label value: {count, sum, mean}}}, "counters": {metric: {label value: count}}}.
+        """
+        with self.lock:
+            histograms = {}
+            for (metric, _, value), histogram in self.histograms.items():
+                histograms.setdefault(metric, {})[value] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                }
+            counters = {}
+            for (metric, _, value), count in self.counters.items():
+                counters.setdefault(metric, {})[value or ""] = count
+            return {"histograms": histograms, "counters": counters}
+
+    def to_prometheus(self):
+        """Renders all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            for metric in sorted({key[0] for key in self.histograms}):
+                lines.append(f"# TYPE {metric} histogram")
+                for (name, label, value), histogram in sorted(self.histograms.items()):
+                    if name != metric:
+                        continue
+                    for bound, cumulative in histogram.cumulative_buckets():
+                        lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{{label}="{value}"}} {histogram.sum:.6f}')
+                    lines.append(f'{metric}_count{{{label}="{value}"}} {histogram.count}')
+            for metric in sorted({key[0] for key in self.counters}):
+                lines.append(f"# TYPE {metric} counter")
+                for (name, label, value), count in sorted(self.counters.items(), key=lambda item: str(item[0])):
+                    if name == metric:
+                        labels = f'{{{label}="{value}"}}' if label else ""
+                        lines.append(f"{metric}{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+def instrument(agent, metrics):
+    """
+    Adds metrics to one agent instance by wrapping its observe/think/act methods, its LLM and its tools.
+
+    think() is split into prompt build (until the LLM is called), LLM wait, and parse (after the
+    LLM returns). Agents without an LLM (rule-based ones) just record think as a whole.
+
+    Returns:
+        The same agent, for chaining.
+    """
+    llm_timestamps = threading.local()
+
+    for phase in ("observe", "act", "act_plan"):
+        if hasattr(agent, phase):
+            original = getattr(agent, phase)
+
+            def timed_method(*args, _original=original, _phase=phase, **kwargs):
+                with metrics.timed(_phase):
+                    return _original(*args, **kwargs)
+
+            setattr(agent, phase, timed_method)
+
+    if getattr(agent, "llm", None) is not None:
+        llm = agent.llm
+
+        def timed_llm(prompt, *args, **kwargs):
+            llm_timestamps.start = time.perf_counter()
+            try:
+                return llm(prompt, *args, **kwargs)
+            finally:
+                llm_timestamps.end = time.perf_counter()
+                metrics.increment("react_llm_calls_total")
+
+        if hasattr(llm, "stream"):
+            timed_llm.stream = llm.stream  # Streaming think (scripts 6 and 7) keeps working, untimed
+        agent.llm = timed_llm
+
+    if hasattr(agent, "think"):
+        original_think = agent.think
+
+        def timed_think(*args, **kwargs):
+            llm_timestamps.start = llm_timestamps.end = None
+            start = time.perf_counter()
+            with metrics.timed("think"):
+                result = original_think(*args, **kwargs)
+                end = time.perf_counter()
+            if llm_timestamps.start is not None and llm_timestamps.end is not None:
+                metrics.observe("react_phase_duration_seconds", "phase", "think_prompt_build", llm_timestamps.start - start)
+                metrics.observe("react_phase_duration_seconds", "phase", "think_llm_wait", llm_timestamps.end - llm_timestamps.start)
+                metrics.observe("react_phase_duration_seconds", "phase", "think_parse", end - llm_timestamps.end)
+            return result
+
+        agent.think = timed_think
+
+    # Tools are usually shared between agents, so each tool is wrapped only once.
+    for tool_name, tool in getattr(agent, "tools", {}).items():
+        for method_name in ("search", "calculate"):
+            if hasattr(tool, method_name) and not getattr(getattr(tool, method_name), "instrumented", False):
+                original = getattr(tool, method_name)
+
+                def timed_tool(*args, _original=original, _tool_name=tool_name, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return _original(*args, **kwargs)
+                    finally:
+                        metrics.observe("react_tool_duration_seconds", "tool", _tool_name, time.perf_counter() - start)
+                        metrics.increment("react_tool_calls_total", "tool", _tool_name)
+
+                timed_tool.instrumented = True
+                setattr(tool, method_name, timed_tool)
+    return agent
+
+
+class FakeLLM:
+    """A local stand-in for the OpenAI LLM with a configurable latency."""
+    def __init__(self, latency=0.02):
+        self.latency = latency
+
+    def __call__(self, prompt):
+        time.sleep(self.latency)
+        return "dust the room" if "dusty" in prompt else "clean the room"
+
+class BasicEnvironment:
+    """
+    Represents a simple environment with different states.
+
+    Attributes:
+        current_state (str): The current state of the environment.
+    """
+    def __init__(self, initial_state):
+        self.current_state = initial_state
+
+    def get_state(self):
+        """Returns the current state of the environment."""
+        return self.current_state
+
+    def change_state(self, new_state):
+        """Changes the state of the environment."""
+        self.current_state = new_state
+
+class ReActAgent:
+    """The LLM-driven agent from 4_react_with_llm_basic.py, taking its LLM as a parameter."""
+    def __init__(self, environment, llm):
+        self.environment = environment
+        self.llm = llm
+
+    def observe(self):
+        return self.environment.get_state()
+
+    def think(self, observation):
+        prompt = f"""
+        You are an agent in a simple environment. Your goal is to keep the room clean.
+        The current state of the room is: {observation}
+
+        Based on this observation, what action should you take?
+
+        Action:
+        """
+        try:
+            llm_output = self.llm(prompt)
+            action = llm_output.strip()
+        except Exception as e:
+            print(f"Error during LLM call: {e}")
+            action = "unknown state"
+        return action
+
+    def act(self, action, debug=False):
+        if debug:
+            print(f"Raw LLM Output: {action}")
+
+        if "clean" in action.lower():
+            self.environment.change_state("clean")
+            return "You cleaned the room. It is now clean."
+        elif "dust" in action.lower():
+            self.environment.change_state("less messy")
+            return "You dusted the room. It is now less messy, but still needs cleaning."
+        elif "nothing" in action.lower() or "relax" in action.lower():
+            return "You did nothing."
+        elif "unknown" in action.lower():
+            return "I don't know what to do in this state."
+        else:
+            return f"I don't know how to do '{action}'."
+
+if __name__ == "__main__":
+    metrics = AgentMetrics()
+    possible_states = ["messy", "clean", "dusty"]
+
+    for episode in range(10):
+        room_environment = BasicEnvironment(random.choice(possible_states))
+        agent = instrument(ReActAgent(room_environment, FakeLLM(latency=random.uniform(0.01, 0.05))), metrics)
+        for cycle in range(3):
+            agent.act(agent.think(agent.observe()))
+
+    print("--- Snapshot ---")
+    for phase, values in metrics.snapshot()["histograms"]["react_phase_duration_seconds"].items():
+        print(f"{phase:>20}: {values['count']:3d} calls, mean {values['mean'] * 1000:8.3f} ms")
+    print("\n--- Prometheus ---")
+    print(metrics.to_prometheus())
@@ -0,0 +1,150 @@
+# 18_prompt_prefix_cache.py
+# This script demonstrates why the agent scripts build their prompts as a static prefix
+# followed by a dynamic suffix. Inference servers cache the work done on prompt prefixes
+# in fixed-size blocks, and a block can only be reused if every block before it matched.
+# A goal or state placed near the top of a prompt therefore invalidates everything below it.
+
+import hashlib
+import random
+import textwrap
+
+
+class PromptBuilder:
+    """
+    Builds prompts as a byte-stable static prefix followed by a dynamic suffix.
+
+    This is the same builder as in scripts 4 to 9.
+
+    Attributes:
+        static_prefix (str): The fixed start of every prompt.
+        cue (str): The line the model completes (e.g. "Action:").
+        fingerprint (str): A short hash of the static prefix; it must not change between calls.
+    """
+    def __init__(self, static_prefix, cue):
+        self.static_prefix = textwrap.dedent(static_prefix).strip() + "\n"
+        self.cue = cue
+        self.fingerprint = hashlib.sha256(self.static_prefix.encode("utf-8")).hexdigest()[:16]
+
+    def build(self, *sections):
+        """Returns the static prefix, then each (label, value) section in order, then the cue."""
+        dynamic_suffix = "".join(f"\n{label}: {value}" for label, value in sections)
+        return f"{self.static_prefix}{dynamic_suffix}\n\n{self.cue}"
+
+class PrefixCacheStandIn:
+    """
+    A local stand-in for the automatic prefix cache of an inference server.
+
+    Prompts are split into blocks of `block_size` characters (servers use tokens; characters
+    keep this dependency-free). Each block is identified by a hash chained over all blocks
+    before it, so a block is a hit only if the whole prefix up to and including it was seen.
+
+    Attributes:
+        hit_chars (int): Prompt characters that were served from the cache.
+        total_chars (int): All prompt characters seen.
+        prefix_fingerprints (dict): Calls per static prefix fingerprint, if callers report one.
+    """
+    def __init__(self, block_size=64, max_blocks=100_000):
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.blocks = set()
+        self.hit_chars = 0
+        self.total_chars = 0
+        self.prefix_fingerprints = {}
+
+    def process(self, prompt, prefix_fingerprint=None):
+        """
+        Runs one prompt through the cache.
+
+        Returns:
+            int: The number of leading characters of the prompt that were cache hits.
+        """
+        if prefix_fingerprint is not None:
+            self.prefix_fingerprints[prefix_fingerprint] = self.prefix_fingerprints.get(prefix_fingerprint, 0) + 1
+        chain = hashlib.sha256()
+        hit_chars = 0
+        still_hitting = True
+        for start in range(0, len(prompt), self.block_size):
+            block = prompt[start:start + self.block_size]
+            if len(block) < self.block_size:
+                break  # Servers only cache full blocks
+            chain.update(block.encode("utf-8"))
+            block_id = chain.digest()
+            if still_hitting and block_id in self.blocks:
+                hit_chars += len(block)
+            else:
+                still_hitting = False
+                if len(self.blocks) < self.max_blocks:
+                    self.blocks.add(block_id)
+        self.hit_chars += hit_chars
+        self.total_chars += len(prompt)
+        return hit_chars
+
+    @property
+    def hit_ratio(self):
+        """The share of prompt characters served from the cache."""
+        return self.hit_chars / self.total_chars if self.total_chars else 0.0
+
+
+# The memory prompt of 5_react_with_llm_memory.py, before and after the static prefix was pulled out.
+
+def interleaved_memory_prompt(observation, goal, memory_string):
+    return f"""
+        You are an agent in a simple environment. Your current goal is: {goal}
+        The current state of the room is: {observation}
+        Here is your memory of past observations, actions, and outcomes:
+        {memory_string}
+
+        Based on your memory and the current state, what is the BEST single action to take NOW to achieve your goal?
+
+        Action:
+        """
+
+MEMORY_PROMPT = PromptBuilder("""
+    You are an agent in a simple environment.
+    You are given your goal, your memory of past observations, actions, and outcomes, and the current state of the room.
+    Based on your memory and the current state, what is the BEST single action to take NOW to achieve your goal?
+""", cue="Action:")
+
+def prefixed_memory_prompt(observation, goal, memory_string):
+    return MEMORY_PROMPT.build(
+        ("Your current goal is", goal),
+        ("Here is your memory of past observations, actions, and outcomes", "\n" + memory_string),
+        ("The current state of the room is", observation),
+    )
+
+def simulate(build_prompt, num_episodes=200, num_cycles=5, seed=0):
+    """
+    Replays memory-agent episodes through the prefix cache stand-in.
+
+    Returns:
+        PrefixCacheStandIn: The cache, with its hit ratio and fingerprint counts.
+    """
+    rng = random.Random(seed)
+    transitions = {"messy": "clean", "dusty": "less messy", "less messy": "clean", "clean": "clean"}
+    actions = {"messy": "clean the room", "dusty": "dust the room", "less messy": "clean the room", "clean": "do nothing"}
+    cache = PrefixCacheStandIn()
+    for episode in range(num_episodes):
+        goal = f"Make room {rng.randrange(10_000)} clean."  # Goals differ per user request
+        state = rng.choice(list(transitions))
+        memory = []
+        for cycle in range(num_cycles):
+            memory_string = "\n".join(memory) if memory else "No memory available."
+            prompt = build_prompt(state, goal, memory_string)
+            cache.process(prompt, MEMORY_PROMPT.fingerprint if build_prompt is prefixed_memory_prompt else None)
+            action = actions[state]
+            state = transitions[state]
+            memory.append(f"Observation: {state}, Action: {action}, Outcome: done")
+            memory = memory[-5:]
+    return cache
+
+if __name__ == "__main__":
+    print(f"Static prefix ({len(MEMORY_PROMPT.static_prefix)} chars), fingerprint {MEMORY_PROMPT.fingerprint}:")
+    print(MEMORY_PROMPT.static_prefix)
+
+    interleaved = simulate(interleaved_memory_prompt)
+    prefixed = simulate(prefixed_memory_prompt)
+    print(f"Interleaved prompt:     {interleaved.hit_ratio:6.1%} of prompt characters served from the prefix cache")
+    print(f"Static prefix + suffix: {prefixed.hit_ratio:6.1%} of prompt characters served from the prefix cache")
+
+    # Every call must report the same fingerprint; more than one means the prefix is not stable.
+    print(f"Distinct static prefixes seen: {len(prefixed.prefix_fingerprints)} ({sum(prefixed.prefix_fingerprints.values())} calls)")
@@ -0,0 +1,285 @@
+# 19_trajectory_log.py
+# This script demonstrates recording the observe/think/act events of agents to a binary,
+# append-only trajectory log instead of printing them. Every event is one fixed-width
+# record, so the reader can memory-map the file and hand out each column as a NumPy array
+# without parsing or copying anything, even for tens of millions of steps.
+
+import os
+import random
+import tempfile
+import time
+import numpy as np
+
+MAGIC = b"RTRJ"
+VERSION = 1
+HEADER_SIZE = 16  # Magic, version, record size, padding
+
+OBSERVE, THINK, ACT = 0, 1, 2
+EVENT_NAMES = ["observe", "think", "act"]
+NO_STRING = 0xFFFFFFFF  # String id for "not applicable" (e.g. the action of an observe event)
+
+RECORD_DTYPE = np.dtype([
+    ("episode", "<u4"),
+    ("step", "<u4"),
+    ("event", "u1"),
+    ("state", "<u4"),  # Id in the string table
+    ("action", "<u4"),  # Id in the string table
+    ("latency", "<f4"),  # Seconds
+    ("prompt_tokens", "<u4"),
+    ("completion_tokens", "<u4"),
+    ("timestamp", "<f8"),
+])
+
+
+class StringTable:
+    """
+    Interns strings (states, actions) to integer ids, stored next to the log.
+
+    The table is an append-only text file with one string per line; the line number is
+    the id. Strings must not contain newlines.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.strings = []
+        self.ids = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as table_file:
+                for line in table_file:
+                    self.ids[line[:-1]] = len(self.strings)
+                    self.strings.append(line[:-1])
+        self.table_file = None
+
+    def intern(self, text):
+        """Returns the id of a string, adding it to the table the first time it is seen."""
+        if text is None:
+            return NO_STRING
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.ids[text] = string_id
+            self.strings.append(text)
+            if self.table_file is None:
+                self.table_file = open(self.path, "a", encoding="utf-8")
+            self.table_file.write(text.replace("\n", " ") + "\n")
+            self.table_file.flush()  # Ids must be on disk before records that use them
+        return string_id
+
+    def close(self):
+        if self.table_file is not None:
+            self.table_file.close()
+            self.table_file = None
+
+class TrajectoryWriter:
+    """
+    Appends fixed-width event records to a trajectory log.
+
+    Records are buffered in a NumPy array and written in batches of `buffer_size`, so
+    logging an event costs a few array assignments. Opening an existing log appends to it.
+
+    Attributes:
+        path (str): The log file; the string table is stored at `path + ".strings"`.
+        strings (StringTable): Interned state and action names.
+    """
+    def __init__(self, path, buffer_size=65536):
+        self.path = path
+        self.strings = StringTable(path + ".strings")
+        self.buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self.buffered = 0
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.log_file = open(path, "ab")
+        if is_new:
+            header = MAGIC + np.array([VERSION, RECORD_DTYPE.itemsize], dtype="<u4").tobytes()
+            self.log_file.write(header.ljust(HEADER_SIZE, b"\0"))
+        else:
+            self._truncate_partial_record()
+
+    def _truncate_partial_record(self):
+        """Drops a record left half-written by a crash, so every later record stays aligned."""
+        size = os.path.getsize(self.path)
+        extra = (size - HEADER_SIZE) % RECORD_DTYPE.itemsize
+        if extra:
+            self.log_file.truncate(size - extra)
+
+    def log(self, episode, step, event, state=None, action=None, latency=0.0, prompt_tokens=0, completion_tokens=0):
+        """Buffers one event record."""
+        if self.buffered == len(self.buffer):
+            self.flush()
+        self.buffer[self.buffered] = (
+            episode, step, event, self.strings.intern(state), self.strings.intern(action),
+            latency, prompt_tokens, completion_tokens, time.time(),
+        )
+        self.buffered += 1
+
+    def log_many(self, records):
+        """Appends an array of RECORD_DTYPE records (e.g. from a vectorized simulation) as is."""
+        self.flush()
+        self.log_file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+
+    def flush(self):
+        if self.buffered:
+            self.log_file.write(self.buffer[:self.buffered].tobytes())
+            self.buffered = 0
+        self.log_file.flush()
+
+    def close(self):
+        self.flush()
+        self.log_file.close()
+        self.strings.close()
+
+class TrajectoryReader:
+    """
+    Reads a trajectory log by memory-mapping it.
+
+    `reader["latency"]`, `reader["episode"]`, ... are NumPy views into the mapped file:
+    nothing is parsed or copied until a computation touches the data. A record that is
+    still being written by a live writer is ignored.
+
+    Attributes:
+        records (np.memmap): All complete records.
+        strings (list): The string table; `strings[state_id]` is the state name.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as log_file:
+            header = log_file.read(HEADER_SIZE)
+        if header[:4] != MAGIC:
+            raise ValueError(f"{path} is not a trajectory log")
+        version, record_size = np.frombuffer(header[4:12], dtype="<u4")
+        if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"Unsupported trajectory log version {version} (record size {record_size})")
+        num_records = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if num_records:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(num_records,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+        self.strings = StringTable(path + ".strings").strings
+
+    def __getitem__(self, column):
+        return self.records[column]
+
+    def __len__(self):
+        return len(self.records)
+
+    def string_id(self, text):
+        """Returns the id of a state or action name, or None if it never occurs in the log."""
+        return self.strings.index(text) if text in self.strings else None
+
+def success_rate(reader, goal_state="clean"):
+    """Returns the share of episodes whose last act event left the room in `goal_state`."""
+    acts = reader["event"] == ACT
+    episodes = reader["episode"][acts]
+    states = reader["state"][acts]
+    if not len(episodes):
+        return 0.0
+    # Records are appended in order, so the last act of an episode is its first in reverse order
+    _, last_in_reverse = np.unique(episodes[::-1], return_index=True)
+    final_states = states[::-1][last_in_reverse]
+    return float(np.mean(final_states == reader.string_id(goal_state)))
+
+def latency_summary(reader):
+    """Returns {event name: (count, p50, p99)} latencies in milliseconds."""
+    summary = {}
+    events = reader["event"]
+    for code, name in enumerate(EVENT_NAMES):
+        latencies = reader["latency"][events == code]
+        if len(latencies):
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            summary[name] = (len(latencies), p50, p99)
+    return summary
+
+
+# --- Recording a live agent (the rule-based agent from 3_rule_based_react.py, with a fake LLM latency) ---
+
+class BasicEnvironment:
+    def __init__(self, initial_state):
+        self.current_state = initial_state
+
+    def get_state(self):
+        return self.current_state
+
+    def change_state(self, new_state):
+        self.current_state = new_state
+
+class ReActAgent:
+    RULES = {"messy": "clean the room", "dusty": "dust the room", "less messy": "clean the room", "clean": "do nothing"}
+
+    def __init__(self, environment):
+        self.environment = environment
+
+    def observe(self):
+        return self.environment.get_state()
+
+    def think(self, observation):
+        time.sleep(random.uniform(0.0005, 0.002))  # Stands in for the LLM call
+        return self.RULES.get(observation, "unknown state")
+
+    def act(self, action):
+        if action == "clean the room":
+            self.environment.change_state("clean")
+        elif action == "dust the room":
+            self.environment.change_state("less messy")
+        return self.environment.get_state()
+
+def run_recorded_episode(agent, writer, episode, num_cycles=3):
+    """Runs the ReAct cycle and logs each phase as a record instead of printing it."""
+    for step in range(num_cycles):
+        start = time.perf_counter()
+        observation = agent.observe()
+        writer.log(episode, step, OBSERVE, state=observation, latency=time.perf_counter() - start)
+
+        start = time.perf_counter()
+        action = agent.think(observation)
+        writer.log(episode, step, THINK, state=observation, action=action, latency=time.perf_counter() - start,
+                   prompt_tokens=40, completion_tokens=len(action.split()))
+
+        start = time.perf_counter()
+        new_state = agent.act(action)
+        writer.log(episode, step, ACT, state=new_state, action=action, latency=time.perf_counter() - start)
+        if new_state == "clean":
+            break
+
+def synthetic_records(num_steps, strings, first_episode, seed=0):
+    """Builds a large batch of act records, as a vectorized fleet (see 12_vectorized_room_fleet.py) would log them."""
+    rng = np.random.default_rng(seed)
+    records = np.zeros(num_steps, dtype=RECORD_DTYPE)
+    records["episode"] = first_episode + np.arange(num_steps) // 3
+    records["step"] = np.arange(num_steps) % 3
+    records["event"] = ACT
+    state_ids = np.array([strings.intern(state) for state in ["clean", "less messy", "messy"]], dtype=np.uint32)
+    records["state"] = state_ids[rng.choice(3, size=num_steps, p=[0.8, 0.15, 0.05])]
+    records["action"] = strings.intern("clean the room")
+    records["latency"] = rng.lognormal(-7, 0.5, size=num_steps)
+    records["timestamp"] = time.time()
+    return records
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as log_dir:  # The demo log is removed when the script ends
+        log_path = os.path.join(log_dir, "trajectories.rtrj")
+
+        writer = TrajectoryWriter(log_path)
+        possible_states = ["messy", "clean", "dusty", "less messy"]
+        num_episodes = 200
+        for episode in range(num_episodes):
+            run_recorded_episode(ReActAgent(BasicEnvironment(random.choice(possible_states))), writer, episode)
+        writer.flush()
+
+        reader = TrajectoryReader(log_path)
+        print(f"Recorded {len(reader)} events from {num_episodes} live episodes ({RECORD_DTYPE.itemsize} bytes each)")
+        print(f"Success rate: {success_rate(reader):.1%}")
+        for name, (count, p50, p99) in latency_summary(reader).items():
+            print(f"{name:>8}: {count:6d} events, p50 {p50:7.3f} ms, p99 {p99:7.3f} ms")
+
+        num_steps = 200_000  # About 7 MB; raise it to see the reader stay fast at tens of millions of steps
+        start = time.perf_counter()
+        writer.log_many(synthetic_records(num_steps, writer.strings, first_episode=num_episodes))
+        writer.close()
+        print(f"\nAppended {num_steps:,} synthetic steps in {time.perf_counter() - start:.2f}s "
+              f"({os.path.getsize(log_path) / 1e6:.0f} MB)")
+
+        start = time.perf_counter()
+        reader = TrajectoryReader(log_path)
+        rate = success_rate(reader)
+        summary = latency_summary(reader)
+        print(f"Mapped {len(reader):,} records and aggregated them in {time.perf_counter() - start:.2f}s: "
+              f"success rate {rate:.1%}, act p50 {summary['act'][1]:.3f} ms")
+        print(f"Zero-copy columns: {not reader['latency'].flags.owndata}")
+        reader = None  # Releases the memory map before the directory is removed
@@ -0,0 +1,67 @@
+# 20_import_time_benchmark.py
+# This script measures how long it takes to import the agent scripts 4 to 9 in a fresh
+# interpreter, and how much of the old import cost (langchain and python-dotenv, which
+# used to be imported at module level) is now deferred to the first think().
+#
+#     python 20_import_time_benchmark.py [repeats]
+
+import os
+import statistics
+import subprocess
+import sys
+
+AGENT_SCRIPTS = [
+    "Part_2_LLM_Powered_ReAct_Agents/4_react_with_llm_basic.py",
+    "Part_2_LLM_Powered_ReAct_Agents/5_react_with_llm_memory.py",
+    "Part_2_LLM_Powered_ReAct_Agents/6_react_with_llm_plan_generation.py",
+    "Part_2_LLM_Powered_ReAct_Agents/7_react_with_llm_plan_execution.py",
+    "Part_2_LLM_Powered_ReAct_Agents/8_react_with_llm_dynamic_planning.py",
+    "Part_3_Real_World_Agent_Capabilities/9_react_with_tools.py",
+]
+
+# Runs in a fresh interpreter: loads the agent module (without running its demo), then
+# imports what the first think() imports, and prints both durations in seconds.
+MEASURE = """
+import runpy, sys, time
+start = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name="imported")
+module_seconds = time.perf_counter() - start
+imported_backend = "langchain" in sys.modules
+start = time.perf_counter()
+try:
+    import langchain.llms, dotenv
+    backend_seconds = time.perf_counter() - start
+except ImportError:
+    backend_seconds = float("nan")
+print(module_seconds, backend_seconds, imported_backend)
+"""
+
+def measure(script_path, repeats=5):
+    """
+    Imports one agent script `repeats` times, each in a new process.
+
+    Returns:
+        tuple: (median module import seconds, median deferred backend import seconds, whether
+            importing the module loaded langchain anyway).
+    """
+    module_times, backend_times = [], []
+    imported_backend = False
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE, script_path], capture_output=True, text=True, check=True,
+        ).stdout.split()
+        module_times.append(float(output[0]))
+        backend_times.append(float(output[1]))
+        imported_backend |= output[2] == "True"
+    return statistics.median(module_times), statistics.median(backend_times), imported_backend
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    print(f"{'Script':<40} {'Import':>10} {'Deferred to first think':>25}")
+    for script in AGENT_SCRIPTS:
+        module_seconds, backend_seconds, imported_backend = measure(os.path.join(root, script), repeats)
+        deferred = "langchain not installed" if backend_seconds != backend_seconds else f"{backend_seconds * 1000:.0f} ms"
+        warning = "  (imports langchain eagerly!)" if imported_backend else ""
+        print(f"{os.path.basename(script):<40} {module_seconds * 1000:>7.1f} ms {deferred:>25}{warning}")